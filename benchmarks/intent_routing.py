@@ -0,0 +1,110 @@
+"""Micro-benchmark for IntentRouter: routing cost and accuracy over a labelled corpus.
+
+Usage:
+    python benchmarks/intent_routing.py [--corpus PATH] [--iterations N]
+
+Each corpus line is a JSON object with the utterance "text", the expected
+top "intent" (or null) and the expected "entities". For comparison the
+benchmark also times the previous sequential cascade of uncompiled
+re.search calls.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.intent_router import IntentRouter
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "utterances.jsonl")
+
+# The regex cascade IntentRouter replaced, kept only as a timing reference
+LEGACY_CASCADE = [
+    ('weather', [r'weather\s+in\s+([a-zA-Z\s]+)', r'weather\s+(?:for|at)\s+([a-zA-Z\s]+)',
+                 r'what\'s\s+the\s+weather\s+(?:in|at|for)\s+([a-zA-Z\s]+)',
+                 r'how\'s\s+the\s+weather\s+(?:in|at|for)\s+([a-zA-Z\s]+)']),
+    ('news', [r'(latest|recent|current)\s+news', r'news\s+(?:about|on)\s+([a-zA-Z\s]+)',
+              r'what\'s\s+(?:happening|going\s+on)', r'current\s+events']),
+    ('stock', [r'stock\s+(?:price|value|info)?\s+(?:for|of)\s+([A-Za-z]+)', r'how\s+is\s+([A-Za-z]+)\s+stock',
+               r'what\'s\s+([A-Za-z]+)\s+stock\s+(?:price|doing)']),
+    ('search', [r'search\s+(?:for|about)\s+([a-zA-Z0-9\s]+)',
+                r'find\s+(?:info|information)\s+(?:about|on)\s+([a-zA-Z0-9\s]+)',
+                r'who\s+is\s+([a-zA-Z\s]+)', r'what\s+is\s+([a-zA-Z0-9\s]+)',
+                r'tell\s+me\s+about\s+([a-zA-Z0-9\s]+)', r'how\s+(?:to|do|does|can)\s+([a-zA-Z0-9\s]+)']),
+]
+
+
+def legacy_route(text):
+    """Return the first intent type the old cascade would have picked."""
+    text = text.lower()
+    for intent_type, patterns in LEGACY_CASCADE:
+        for pattern in patterns:
+            if re.search(pattern, text):
+                return intent_type
+    return None
+
+
+def load_corpus(path):
+    """Load the labelled utterances."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def time_per_call(func, texts, iterations):
+    """Return the mean time in microseconds per call of func over texts."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - start) / (iterations * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    texts = [item["text"] for item in corpus]
+    router = IntentRouter()
+
+    # Accuracy of the top intent and its entities
+    type_hits = entity_hits = legacy_hits = 0
+    misses = []
+    for item in corpus:
+        intent = router.best(item["text"])
+        got_type = intent.type if intent else None
+        got_entities = intent.entities if intent else None
+        if got_type == item["intent"]:
+            type_hits += 1
+            if got_entities == item["entities"]:
+                entity_hits += 1
+            else:
+                misses.append((item["text"], got_type, got_entities))
+        else:
+            misses.append((item["text"], got_type, got_entities))
+
+        expected_legacy = "stock" if item["intent"] == "portfolio" else item["intent"]
+        if legacy_route(item["text"]) == expected_legacy:
+            legacy_hits += 1
+
+    router_us = time_per_call(router.route, texts, args.iterations)
+    legacy_us = time_per_call(legacy_route, texts, args.iterations)
+
+    total = len(corpus)
+    print(f"Utterances:        {total}")
+    print(f"Intent accuracy:   {type_hits / total:.1%}")
+    print(f"Entity accuracy:   {entity_hits / total:.1%}")
+    print(f"Legacy accuracy:   {legacy_hits / total:.1%} (intent type only)")
+    print(f"Router cost:       {router_us:.2f} us/utterance")
+    print(f"Legacy cost:       {legacy_us:.2f} us/utterance")
+    for text, got_type, got_entities in misses:
+        print(f"  miss: {text!r} -> {got_type} {got_entities}")
+
+
+if __name__ == "__main__":
+    main()
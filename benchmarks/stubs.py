@@ -0,0 +1,314 @@
+"""Local stand-in HTTP servers for OpenAI and every provider InternetUtils talks to.
+
+All stubs share one aiohttp server on 127.0.0.1 running in a child process.
+Each route has configurable latency (plus jitter) and a failure rate; failed
+requests answer with error_status. Responses are deterministic for a given
+seed, so benchmark runs are reproducible.
+
+    with StubServers(latency=0.02) as stubs:
+        internet = InternetUtils("stub", endpoints=stubs.endpoints())
+        client = OpenAI(api_key="stub", base_url=stubs.openai_base_url)
+"""
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+from aiohttp import web
+
+ROUTES = ('openai', 'serpapi', 'duckduckgo', 'weather', 'news', 'stock', 'pages')
+
+
+class StubApp:
+    """The stub server itself: provider and OpenAI handlers plus a small control API.
+
+    POST /_stub/configure {"route": ..., "latency": ...} changes a route's faults,
+    GET /_stub/stats returns request and failure counts and POST /_stub/reset
+    zeroes them.
+    """
+
+    def __init__(self, faults, seed=0, page_bytes=64 * 1024, reply_words=60, token_delay=0.0):
+        self.faults = faults
+        self.page_bytes = page_bytes
+        self.reply_words = reply_words
+        self.token_delay = token_delay
+        self.requests = {route: 0 for route in ROUTES}
+        self.failures = {route: 0 for route in ROUTES}
+        self.seed = seed
+        self._attempts = {}
+        self.base_url = None
+
+    def page_url(self, n):
+        """Return the URL of stub HTML page n."""
+        return f"{self.base_url}/pages/{n}"
+
+    async def serve(self):
+        """Serve on a free port, print it for the parent process and run until stopped."""
+        app = web.Application()
+        app.add_routes([
+            web.post('/v1/chat/completions', self._chat),
+            web.get('/v1/models', self._models),
+            web.get('/serpapi/search', self._serpapi),
+            web.get('/duckduckgo/lite/', self._duckduckgo),
+            web.get('/weather/data/2.5/weather', self._weather),
+            web.get('/news/v2/top-headlines', self._news),
+            web.get('/stock/query', self._stock),
+            web.get('/pages/{n}', self._page),
+            web.post('/_stub/configure', self._configure),
+            web.get('/_stub/stats', self._stats),
+            web.post('/_stub/reset', self._reset),
+        ])
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        print(port, flush=True)
+        await asyncio.Event().wait()
+
+    # Control API
+
+    async def _configure(self, request):
+        body = await request.json()
+        self.faults[body.pop('route')].update(body)
+        return web.json_response({'ok': True})
+
+    async def _stats(self, request):
+        return web.json_response({'requests': self.requests, 'failures': self.failures})
+
+    async def _reset(self, request):
+        for route in ROUTES:
+            self.requests[route] = 0
+            self.failures[route] = 0
+        self._attempts.clear()
+        return web.json_response({'ok': True})
+
+    # Fault injection
+
+    async def _inject(self, route, request):
+        """Sleep for the route's latency and return an error response if this request should fail.
+
+        Jitter and failures are drawn from a generator seeded with the request and how
+        many times it has been seen, so each URL gets the same sequence of outcomes
+        however concurrent requests interleave.
+        """
+        self.requests[route] += 1
+        key = (route, request.path_qs)
+        self._attempts[key] = attempt = self._attempts.get(key, 0) + 1
+        draw = random.Random(f"{self.seed}:{route}:{request.path_qs}:{attempt}")
+
+        faults = self.faults[route]
+        delay = faults['latency'] + (draw.uniform(0, faults['jitter']) if faults['jitter'] else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if faults['failure_rate'] and draw.random() < faults['failure_rate']:
+            self.failures[route] += 1
+            return web.json_response({'error': 'injected failure'}, status=faults['error_status'])
+        return None
+
+    # Handlers
+
+    async def _chat(self, request):
+        failure = await self._inject('openai', request)
+        if failure is not None:
+            return failure
+
+        body = await request.json()
+        model = body.get('model', 'stub-model')
+        prompt = " ".join(str(message.get('content') or '') for message in body.get('messages', []))
+        words = [f"word{i}" for i in range(self.reply_words)]
+        usage = {'prompt_tokens': len(prompt) // 4 + 1, 'completion_tokens': len(words),
+                 'total_tokens': len(prompt) // 4 + 1 + len(words)}
+
+        if not body.get('stream'):
+            return web.json_response({
+                'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': int(time.time()), 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': " ".join(words)},
+                             'finish_reason': 'stop'}],
+                'usage': usage,
+            })
+
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+
+        def event(payload):
+            return f"data: {json.dumps(payload)}\n\n".encode()
+
+        base = {'id': 'chatcmpl-stub', 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model}
+        try:
+            for i, word in enumerate(words):
+                if self.token_delay:
+                    await asyncio.sleep(self.token_delay)
+                delta = {'content': word if i == 0 else " " + word}
+                await response.write(event(dict(base, choices=[{'index': 0, 'delta': delta, 'finish_reason': None}])))
+            await response.write(event(dict(base, choices=[{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])))
+            if (body.get('stream_options') or {}).get('include_usage'):
+                await response.write(event(dict(base, choices=[], usage=usage)))
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+        except ConnectionResetError:
+            pass  # The client closed the stream early, e.g. a cancelled request
+        return response
+
+    async def _models(self, request):
+        failure = await self._inject('openai', request)
+        if failure is not None:
+            return failure
+        return web.json_response({'object': 'list', 'data': [
+            {'id': 'gpt-4-turbo', 'object': 'model', 'created': 1700000000, 'owned_by': 'stub'}
+        ]})
+
+    async def _serpapi(self, request):
+        failure = await self._inject('serpapi', request)
+        if failure is not None:
+            return failure
+        query = request.query.get('q', '')
+        count = int(request.query.get('num', 5))
+        return web.json_response({'organic_results': [
+            {'title': f"{query} result {i}", 'link': self.page_url(i), 'snippet': f"About {query}, part {i}."}
+            for i in range(count)
+        ]})
+
+    async def _duckduckgo(self, request):
+        failure = await self._inject('duckduckgo', request)
+        if failure is not None:
+            return failure
+        query = request.query.get('q', '')
+        links = "".join(f'<tr><td><a href="{self.page_url(i)}">{query} result {i}</a></td></tr>' for i in range(10))
+        return web.Response(text=f"<html><body><table>{links}</table></body></html>", content_type='text/html')
+
+    async def _weather(self, request):
+        failure = await self._inject('weather', request)
+        if failure is not None:
+            return failure
+        city = request.query.get('q', 'Nowhere')
+        return web.json_response({
+            'name': city.title(), 'sys': {'country': 'XX'}, 'dt': 1700000000,
+            'main': {'temp': 12.5, 'feels_like': 11.0, 'humidity': 70},
+            'weather': [{'description': 'light rain'}], 'wind': {'speed': 3.2},
+        })
+
+    async def _news(self, request):
+        failure = await self._inject('news', request)
+        if failure is not None:
+            return failure
+        category = request.query.get('category', 'general')
+        count = int(request.query.get('pageSize', 5))
+        return web.json_response({'status': 'ok', 'articles': [
+            {'title': f"{category} headline {i}", 'source': {'name': 'Stub Wire'},
+             'description': f"Story {i} about {category}.", 'url': self.page_url(i),
+             'publishedAt': '2024-01-01T00:00:00Z'}
+            for i in range(count)
+        ]})
+
+    async def _stock(self, request):
+        failure = await self._inject('stock', request)
+        if failure is not None:
+            return failure
+        symbol = request.query.get('symbol', 'XXX').upper()
+        return web.json_response({'Global Quote': {
+            '01. symbol': symbol, '05. price': '123.4500', '06. volume': '1000000',
+            '07. latest trading day': '2024-01-02', '09. change': '1.2300', '10. change percent': '1.0070%',
+        }})
+
+    async def _page(self, request):
+        failure = await self._inject('pages', request)
+        if failure is not None:
+            return failure
+        n = request.match_info['n']
+        paragraph = f"<p>Stub page {n} paragraph with some visible text for extraction.</p>\n"
+        filler = "<script>var x = 1;</script>" + paragraph * max(1, self.page_bytes // len(paragraph))
+        return web.Response(text=f"<html><head><title>Page {n}</title></head><body>{filler}</body></html>",
+                            content_type='text/html')
+
+
+class StubServers:
+    """Runs StubApp in a child process, so the stubs never compete with the code under test for the GIL."""
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, error_status=500, seed=0,
+                 page_bytes=64 * 1024, reply_words=60, token_delay=0.0):
+        """Apply latency (seconds), jitter and failure_rate to every route unless overridden with configure()."""
+        self.faults = {route: {'latency': latency, 'jitter': jitter, 'failure_rate': failure_rate,
+                               'error_status': error_status} for route in ROUTES}
+        self.options = {'seed': seed, 'page_bytes': page_bytes, 'reply_words': reply_words, 'token_delay': token_delay}
+        self._process = None
+        self.base_url = None
+
+    def start(self):
+        """Start the stub process and return its base URL."""
+        config = json.dumps({'faults': self.faults, 'options': self.options})
+        self._process = subprocess.Popen([sys.executable, os.path.abspath(__file__), config],
+                                         stdout=subprocess.PIPE, text=True)
+        port = self._process.stdout.readline().strip()
+        if not port:
+            self.stop()
+            raise RuntimeError("stub servers did not start")
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self.base_url
+
+    def stop(self):
+        """Stop the stub process."""
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait(timeout=10)
+            self._process.stdout.close()
+            self._process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _control(self, path, payload=None):
+        """Call the stub control API."""
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(f"{self.base_url}/_stub/{path}", data=data,
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.loads(response.read())
+
+    def configure(self, route, **faults):
+        """Override latency, jitter, failure_rate or error_status for one route."""
+        self.faults[route].update(faults)
+        if self._process is not None:
+            self._control('configure', dict(faults, route=route))
+
+    def stats(self):
+        """Return per-route request and failure counts."""
+        return self._control('stats')
+
+    def reset_counters(self):
+        """Zero the per-route request and failure counts."""
+        self._control('reset', {})
+
+    @property
+    def openai_base_url(self):
+        """Base URL to pass to the OpenAI client."""
+        return f"{self.base_url}/v1"
+
+    def endpoints(self):
+        """Return the endpoints argument for InternetUtils."""
+        return {
+            'serpapi': f"{self.base_url}/serpapi/search",
+            'duckduckgo': f"{self.base_url}/duckduckgo/lite/",
+            'weather': f"{self.base_url}/weather/data/2.5/weather",
+            'news': f"{self.base_url}/news/v2/top-headlines",
+            'stock': f"{self.base_url}/stock/query",
+        }
+
+    def page_url(self, n):
+        """Return the URL of stub HTML page n."""
+        return f"{self.base_url}/pages/{n}"
+
+
+if __name__ == "__main__":
+    # Child process: serve with the configuration passed by StubServers.start
+    config = json.loads(sys.argv[1])
+    asyncio.run(StubApp(config['faults'], **config['options']).serve())
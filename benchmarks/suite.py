@@ -0,0 +1,332 @@
+"""Offline benchmark suite for FridayAssistant and InternetUtils against local stub servers.
+
+Usage:
+    python benchmarks/suite.py [--scenario NAME ...] [--calls N] [--concurrency C] [--repeat R]
+                               [--latency SECONDS] [--failure-rate F]
+                               [--save-baseline] [--check] [--tolerance 0.35]
+
+Every scenario starts from a cold InternetUtils and runs a fixed workload
+through the public synchronous API from a thread pool. The workload cycles
+over a small set of distinct keys, so later calls exercise the caches. Each
+scenario reports p50/p95 latency, throughput, cache hit rate and memory
+growth (tracemalloc, after garbage collection), each the median of --repeat
+runs after an unmeasured warm-up pass.
+
+Results are compared with the stored baseline (benchmarks/baselines/suite.json)
+and regressions beyond the tolerance are listed; --check makes them fail the
+run. Each baseline entry records the run parameters (--calls, --concurrency,
+the stub latencies and failure rate), and scenarios run with different ones
+are not compared. Baselines are machine specific: re-save one when changing
+hardware. Provider rate limits are raised so the numbers measure this code
+rather than the configured quotas.
+"""
+import argparse
+import concurrent.futures
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from openai import OpenAI
+
+from stubs import StubServers
+from utils.assistant import FridayAssistant
+from utils.internet_utils import InternetUtils
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "suite.json")
+
+# Generous enough that no scenario waits on a token bucket
+BENCHMARK_RATE_LIMITS = {provider: (10000.0, 10000) for provider in ('serpapi', 'duckduckgo', 'weather', 'news', 'stock')}
+
+CITIES = ["london", "paris", "tokyo", "boston", "berlin", "madrid", "rome", "oslo"]
+SYMBOLS = ["AAPL", "MSFT", "GOOG", "AMZN", "TSLA", "NVDA", "META", "IBM"]
+TOPICS = ["general", "business", "technology", "science"]
+QUERIES = ["python asyncio", "tony stark", "arc reactor", "rust ownership", "solar flares", "jazz history"]
+PROMPTS = [
+    "what's the weather in london",
+    "what is the latest news",
+    "how is aapl stock",
+    "stock prices for aapl, msft and goog",
+    "search for python asyncio",
+    "weather in tokyo and how is msft stock",
+    "tell me a joke about robots",
+    "thanks friday",
+]
+
+
+def make_internet(stubs, **options):
+    """Return a cold InternetUtils pointed at the stubs."""
+    return InternetUtils("stub-key", endpoints=stubs.endpoints(), rate_limits=BENCHMARK_RATE_LIMITS, **options)
+
+
+class Scenario:
+    """A named workload over keys.
+
+    setup(stubs, workers) returns the InternetUtils under test and one target
+    per worker; call(target, stubs, key) performs a single timed call.
+    """
+
+    def __init__(self, name, keys, call, setup):
+        self.name = name
+        self.keys = keys
+        self.call = call
+        self.setup = setup
+
+
+def _internet(name, keys, call, **options):
+    """Scenario that calls InternetUtils through call(internet, stubs, key)."""
+    def setup(stubs, workers):
+        internet = make_internet(stubs, **options)
+        return internet, [internet] * workers
+    return Scenario(name, keys, call, setup)
+
+
+def _assistant(name, streamed):
+    """Scenario that runs prompts through per-worker FridayAssistants sharing one InternetUtils."""
+    def setup(stubs, workers):
+        internet = make_internet(stubs)
+        client = OpenAI(api_key="stub", base_url=stubs.openai_base_url, max_retries=0)
+        assistants = [FridayAssistant("stub", client=client, internet=internet) for _ in range(workers)]
+        return internet, assistants
+
+    def call(assistant, stubs, prompt):
+        assistant.clear_history()
+        if streamed:
+            return "".join(assistant.ask_stream(prompt))
+        return assistant.ask(prompt)
+
+    return Scenario(name, PROMPTS, call, setup)
+
+
+SCENARIOS = [
+    _internet('search_web.serpapi', QUERIES, lambda internet, stubs, key: internet.search_web(key)),
+    _internet('search_web.duckduckgo', QUERIES, lambda internet, stubs, key: internet.search_web(key)),
+    _internet('fetch_webpage_content', list(range(8)),
+              lambda internet, stubs, key: internet.fetch_webpage_content(stubs.page_url(key))),
+    _internet('fetch_pages', list(range(8)),
+              lambda internet, stubs, key: internet.fetch_pages([stubs.page_url(key + i) for i in range(3)])),
+    _internet('get_weather', CITIES, lambda internet, stubs, key: internet.get_weather(key)),
+    _internet('get_weather.faulty', CITIES, lambda internet, stubs, key: internet.get_weather(key)),
+    _internet('get_news', TOPICS, lambda internet, stubs, key: internet.get_news(key, 5)),
+    _internet('check_stock', SYMBOLS, lambda internet, stubs, key: internet.check_stock(key)),
+    _internet('check_stocks', [SYMBOLS[i:i + 3] for i in range(0, 6)],
+              lambda internet, stubs, key: internet.check_stocks(key, deadline=5.0)),
+    _assistant('assistant.ask', streamed=False),
+    _assistant('assistant.ask_stream', streamed=True),
+]
+
+# Per-scenario overrides applied to the stubs on top of the command-line settings
+SCENARIO_FAULTS = {
+    'search_web.duckduckgo': {'serpapi': {'failure_rate': 1.0}},
+    'get_weather.faulty': {'weather': {'failure_rate': 0.5}},
+}
+
+
+def percentile(values, fraction):
+    """Return the value at fraction (0-1) of the sorted values."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def run_scenario(scenario, stubs, args, calls=None):
+    """Run one scenario (args.calls calls unless calls is given) and return its metrics."""
+    # Fresh stub faults for every scenario
+    for route in stubs.faults:
+        stubs.configure(route, latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate)
+    stubs.configure('openai', latency=args.llm_latency)
+    for route, faults in SCENARIO_FAULTS.get(scenario.name, {}).items():
+        stubs.configure(route, **faults)
+    stubs.reset_counters()
+
+    gc.collect()
+    memory_before = tracemalloc.get_traced_memory()[0]
+
+    internet, targets = scenario.setup(stubs, args.concurrency)
+    items = [scenario.keys[i % len(scenario.keys)] for i in range(calls or args.calls)]
+    latencies = []
+    errors = 0
+
+    def timed(worker, key):
+        started = time.perf_counter()
+        result = scenario.call(targets[worker], stubs, key)
+        return (time.perf_counter() - started) * 1000, result
+
+    started = time.perf_counter()
+    # One item in flight per worker, so each worker's target is never shared
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        pending = {}
+        queue = list(enumerate(items))
+        free = list(range(args.concurrency))
+        while queue or pending:
+            while queue and free:
+                worker = free.pop()
+                _, key = queue.pop(0)
+                pending[pool.submit(timed, worker, key)] = worker
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                free.append(pending.pop(future))
+                try:
+                    latency, result = future.result()
+                    latencies.append(latency)
+                    if _is_error(result):
+                        errors += 1
+                except Exception:
+                    errors += 1
+    elapsed = time.perf_counter() - started
+
+    stats = internet.cache.stats()
+    internet.close()
+    del targets
+    gc.collect()
+    memory_after = tracemalloc.get_traced_memory()[0]
+
+    return {
+        'calls': len(items),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 0.5), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'throughput': round(len(items) / elapsed, 1) if elapsed else 0.0,
+        'cache_hit_rate': round(stats['hit_rate'], 3),
+        'memory_growth_kb': round((memory_after - memory_before) / 1024, 1),
+        'upstream_requests': sum(stubs.stats()['requests'].values()),
+    }
+
+
+def _is_error(result):
+    """Return whether a scenario result is one of InternetUtils' error values."""
+    if isinstance(result, str):
+        return result.startswith(("Error", "I'm experiencing a system error")) or "failed" in result
+    if isinstance(result, list) and result and isinstance(result[0], dict):
+        return result[0].get('title') == 'Search Error'
+    return False
+
+
+def run_parameters(args):
+    """Return the arguments that shape a scenario's workload, as stored with its baseline."""
+    return {
+        'calls': args.calls,
+        'concurrency': args.concurrency,
+        'latency': args.latency,
+        'jitter': args.jitter,
+        'llm_latency': args.llm_latency,
+        'failure_rate': args.failure_rate,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return the regressions of results against baseline and the scenarios that could not be compared.
+
+    A scenario is only compared with a baseline recorded with the same run parameters.
+    """
+    regressions = []
+    mismatched = []
+    for name, metrics in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        if reference.get('params') != metrics['params']:
+            mismatched.append(f"{name}: baseline run with {reference.get('params')}, this run with {metrics['params']}")
+            continue
+        # Millisecond-level p95 differences are scheduler noise, whatever the ratio
+        if metrics['p95_ms'] > reference['p95_ms'] * (1 + tolerance) and metrics['p95_ms'] - reference['p95_ms'] > 10.0:
+            regressions.append(f"{name}: p95 {metrics['p95_ms']}ms vs baseline {reference['p95_ms']}ms")
+        if metrics['throughput'] < reference['throughput'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {metrics['throughput']}/s vs baseline {reference['throughput']}/s")
+        if metrics['cache_hit_rate'] < reference['cache_hit_rate'] - 0.05:
+            regressions.append(f"{name}: cache hit rate {metrics['cache_hit_rate']} vs baseline {reference['cache_hit_rate']}")
+        if metrics['memory_growth_kb'] > max(reference['memory_growth_kb'] * (1 + tolerance), reference['memory_growth_kb'] + 256):
+            regressions.append(f"{name}: memory growth {metrics['memory_growth_kb']}KB vs baseline {reference['memory_growth_kb']}KB")
+    return regressions, mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", action="append", help="Run only these scenarios (repeatable)")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.01, help="Provider stub latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.005, help="Extra random provider latency in seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="OpenAI stub latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Injected failure rate for every provider")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false", help="Skip the unmeasured warm-up pass")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario; each metric is the median")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if any metric regressed")
+    parser.add_argument("--tolerance", type=float, default=0.35, help="Allowed relative regression")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenario or scenario.name in args.scenario]
+    if not scenarios:
+        parser.error(f"unknown scenario; choose from {', '.join(scenario.name for scenario in SCENARIOS)}")
+
+    # InternetUtils reads provider keys from the environment; the stubs accept anything
+    for key in ("OPENWEATHERMAP_KEY", "NEWSAPI_KEY", "ALPHAVANTAGE_KEY"):
+        os.environ[key] = "stub"
+
+    tracemalloc.start()
+    results = {}
+    with StubServers(seed=1) as stubs:
+        for scenario in scenarios:
+            # An unmeasured pass first, so one-time costs (lazy imports, connection setup
+            # in the stubs) don't count as latency or memory growth
+            if args.warmup:
+                run_scenario(scenario, stubs, args, calls=len(scenario.keys))
+            # The median of a few runs keeps one slow run from reading as a regression
+            runs = [run_scenario(scenario, stubs, args) for _ in range(args.repeat)]
+            results[scenario.name] = {metric: sorted(run[metric] for run in runs)[len(runs) // 2] for metric in runs[0]}
+            metrics = results[scenario.name]
+            metrics['params'] = run_parameters(args)
+            print(f"{scenario.name:<24} p50 {metrics['p50_ms']:>9.2f}ms  p95 {metrics['p95_ms']:>9.2f}ms  "
+                  f"{metrics['throughput']:>8.1f}/s  hit {metrics['cache_hit_rate']:>5.1%}  "
+                  f"mem {metrics['memory_growth_kb']:>+8.1f}KB  upstream {metrics['upstream_requests']:>4}  "
+                  f"errors {metrics['errors']}")
+    tracemalloc.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline stored yet; run with --save-baseline to create one.")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions, mismatched = compare(results, baseline, args.tolerance)
+    if mismatched:
+        print("Not compared; re-run with the baseline's parameters or re-save it:")
+        for line in mismatched:
+            print(f"  {line}")
+    if regressions:
+        print("Regressions against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        if args.check:
+            sys.exit(1)
+    elif len(mismatched) < len(results):
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from utils.assistant import FridayAssistant
+from utils.cache import TTLCache
+from utils.internet_utils import InternetUtils
+from utils.tracing import get_tracer, HistogramSink
+
+
+def read_items(stream):
+    """Yield (item_id, item) for each prompt in stream.
+
+    Lines are JSON objects with a "prompt" (a string, or a list of strings run
+    as consecutive turns) and an optional "id"; any other line is taken as a
+    plain-text prompt. Items without an id are numbered by line.
+    """
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            item = None
+        if not isinstance(item, dict):
+            item = {'prompt': line}
+        yield str(item.get('id', number)), item
+
+
+def completed_ids(path, retry_errors=False):
+    """Return the ids already recorded in an output file, so a run can resume."""
+    done = set()
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Torn last line from an interrupted run
+            if retry_errors and not record.get('ok'):
+                continue
+            done.add(str(record.get('id')))
+
+    # Start the next record on a fresh line if the last one was torn
+    with open(path, 'rb+') as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    return done
+
+
+def percentile(values, fraction):
+    """Return the value at fraction (0-1) of the sorted values."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+class BatchRunner:
+    """Runs prompts through a pool of independent FridayAssistant sessions.
+
+    The sessions share one OpenAI client, InternetUtils and answer cache. Items
+    pass through a bounded queue, so input is read only as fast as the workers
+    drain it, and results are written one JSON line each as they finish.
+    """
+
+    def __init__(self, workers=4, use_cache=True, context_budget=8000, queue_size=None):
+        """Create the shared clients and one assistant per worker."""
+        load_dotenv()
+        api_key = os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("API key must be provided or set as OPENAI_API_KEY environment variable")
+
+        self.workers = workers
+        self.use_cache = use_cache
+        self.client = OpenAI(api_key=api_key)
+        self.internet = InternetUtils(os.environ.get("SERPAPI_KEY"))
+        self.answer_cache = TTLCache(max_entries=1024, max_bytes=8 * 1024 * 1024)
+        self.metrics = get_tracer().add_sink(HistogramSink())
+        self.assistants = [
+            FridayAssistant(api_key, context_budget=context_budget, answer_cache=self.answer_cache,
+                            client=self.client, internet=self.internet)
+            for _ in range(workers)
+        ]
+
+        # Backpressure: the reader blocks once this many items are waiting
+        self._queue = queue.Queue(maxsize=queue_size or workers * 2)
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self.latencies = []
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def run(self, items, output, skip=()):
+        """Run items, writing results to the output stream. Returns the number of items run."""
+        threads = [threading.Thread(target=self._work, args=(assistant, output), daemon=True)
+                   for assistant in self.assistants]
+        for thread in threads:
+            thread.start()
+
+        started = time.perf_counter()
+        try:
+            for item_id, item in items:
+                if item_id in skip:
+                    continue
+                self._queue.put((item_id, item))
+        except KeyboardInterrupt:
+            # Let the workers finish what they hold so every written line is complete
+            print("Interrupted; finishing in-flight items. Rerun to resume.", file=sys.stderr)
+            self._stop.set()
+        finally:
+            for _ in threads:
+                self._queue.put(None)
+            for thread in threads:
+                thread.join()
+            self.elapsed = time.perf_counter() - started
+        return len(self.latencies)
+
+    def _work(self, assistant, output):
+        """Worker loop: run queued items on this worker's assistant until told to stop."""
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            if self._stop.is_set():
+                continue
+            item_id, item = entry
+            record = self._run_item(assistant, item_id, item)
+            with self._write_lock:
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                self.latencies.append(record['latency_ms'])
+                if not record['ok']:
+                    self.errors += 1
+
+    def _run_item(self, assistant, item_id, item):
+        """Run one item in a fresh conversation and return its result record."""
+        prompt = item.get('prompt')
+        turns = prompt if isinstance(prompt, list) else [prompt]
+        use_cache = item.get('use_cache', self.use_cache)
+
+        assistant.clear_history()
+        started = time.perf_counter()
+        replies = []
+        ok = True
+        try:
+            for turn in turns:
+                if not isinstance(turn, str) or not turn.strip():
+                    raise ValueError("item has no prompt")
+                reply = assistant.ask(turn, use_cache=use_cache)
+                replies.append(reply)
+                if reply.startswith(assistant.SYSTEM_ERROR):
+                    ok = False
+                    break
+        except Exception as e:
+            replies.append(f"Batch error: {str(e)}")
+            ok = False
+        latency = (time.perf_counter() - started) * 1000
+
+        return {
+            'id': item_id,
+            'prompt': prompt,
+            'reply': replies if isinstance(prompt, list) else (replies[0] if replies else None),
+            'ok': ok,
+            'latency_ms': round(latency, 1),
+        }
+
+    def summary(self):
+        """Return run totals and latency percentiles."""
+        count = len(self.latencies)
+        return {
+            'items': count,
+            'errors': self.errors,
+            'p50_ms': percentile(self.latencies, 0.5),
+            'p95_ms': percentile(self.latencies, 0.95),
+            'items_per_second': round(count / self.elapsed, 2) if self.elapsed else 0.0,
+            'answer_cache': self.answer_cache.stats(),
+            'stages': self.metrics.snapshot()['stages'],
+        }
+
+    def close(self):
+        """Close the shared internet clients."""
+        self.internet.close()
+
+
+def main():
+    """Run a prompt file through FRIDAY without the GUI."""
+    parser = argparse.ArgumentParser(description="Run prompts through F.R.I.D.A.Y. in batch")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL or plain-text prompt file, or - for stdin")
+    parser.add_argument("-o", "--output", help="JSONL results file (default stdout); existing results are skipped")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Concurrent sessions")
+    parser.add_argument("--queue-size", type=int, help="Items read ahead of the workers (default 2 per worker)")
+    parser.add_argument("--no-cache", action="store_true", help="Always ask the model instead of reusing answers")
+    parser.add_argument("--retry-errors", action="store_true", help="Rerun items that failed in a previous run")
+    parser.add_argument("--context-budget", type=int, default=8000)
+    args = parser.parse_args()
+
+    skip = completed_ids(args.output, args.retry_errors)
+    if skip:
+        print(f"Resuming: skipping {len(skip)} completed items", file=sys.stderr)
+
+    runner = BatchRunner(args.workers, not args.no_cache, args.context_budget, args.queue_size)
+    source = sys.stdin if args.input == "-" else open(args.input, encoding='utf-8')
+    output = sys.stdout if not args.output else open(args.output, 'a', encoding='utf-8')
+    try:
+        runner.run(read_items(source), output, skip)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+        runner.close()
+
+    print(json.dumps(runner.summary()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
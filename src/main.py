@@ -1,42 +1,40 @@
+import time
+
+# Startup timings are measured from here
+STARTED = time.perf_counter()
+
+import argparse
+import json
 import os
 import sys
 import tkinter as tk
+from importlib import metadata
 from dotenv import load_dotenv
 from utils.gui import FridayGUI
-import threading
+
+# Distribution names from requirements.txt
+REQUIRED_DISTRIBUTIONS = [
+    'openai',
+    'python-dotenv',
+    'requests',
+    'beautifulsoup4',
+    'aiohttp',
+]
 
 def check_dependencies():
-    """Check if all required dependencies are installed."""
-    required_packages = [
-        'openai',
-        'python-dotenv',
-        'requests',
-        'beautifulsoup4',
-        're',
-    ]
-    
+    """Check that all required distributions are installed, without importing them."""
     missing_packages = []
     
-    for package in required_packages:
+    for package in REQUIRED_DISTRIBUTIONS:
         try:
-            __import__(package)
-        except ImportError:
-            if package == 're':  # re is part of standard library
-                continue
+            metadata.version(package)
+        except metadata.PackageNotFoundError:
             missing_packages.append(package)
     
     if missing_packages:
         print(f"Missing required packages: {', '.join(missing_packages)}")
-        print("Installing missing packages...")
-        
-        import subprocess
-        for package in missing_packages:
-            try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-                print(f"Successfully installed {package}")
-            except subprocess.CalledProcessError:
-                print(f"Failed to install {package}. Please install it manually.")
-                return False
+        print("Install them with: pip install -r requirements.txt")
+        return False
     
     return True
 
@@ -56,6 +54,15 @@ def create_env_file():
 
 def main():
     """Main function to run the FRIDAY Assistant application."""
+    parser = argparse.ArgumentParser(description="F.R.I.D.A.Y. assistant")
+    parser.add_argument("--fast", action="store_true", help="Skip the startup animation")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="Print startup timings as JSON and exit once input is enabled")
+    parser.add_argument("--startup-target-ms", type=float,
+                        default=float(os.environ.get("FRIDAY_STARTUP_TARGET_MS", 1500)),
+                        help="Warn (or with --measure-startup, exit 1) when time to interactive exceeds this")
+    args = parser.parse_args()
+    
     # Ensure all dependencies are installed
     if not check_dependencies():
         print("Error: Missing required dependencies. Please install them and try again.")
@@ -90,11 +97,27 @@ def main():
     center_y = int(screen_height/2 - window_height/2)
     root.geometry(f'{window_width}x{window_height}+{center_x}+{center_y}')
     
+    exit_code = 0
+    
+    def on_interactive(timings):
+        nonlocal exit_code
+        over_target = timings["interactive"] > args.startup_target_ms
+        # A failed assistant load exits non-zero once the window closes
+        exit_code = 1 if "error" in timings else 0
+        if args.measure_startup:
+            print(json.dumps(dict(timings, target=args.startup_target_ms)))
+            exit_code = 1 if over_target else exit_code
+            root.after(0, root.destroy)
+        elif over_target:
+            print(f"Startup took {timings['interactive']:.0f}ms (target {args.startup_target_ms:.0f}ms)")
+    
     # Initialize the GUI
-    app = FridayGUI(root)
+    app = FridayGUI(root, started=STARTED, fast_start=args.fast or None, on_interactive=on_interactive,
+                    modal_errors=not args.measure_startup)
     
     # Start the GUI event loop
     root.mainloop()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
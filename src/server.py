@@ -0,0 +1,341 @@
+import argparse
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from aiohttp import web
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from utils.assistant import FridayAssistant
+from utils.cache import TTLCache
+from utils.cancel import CancelToken, RequestCancelled
+from utils.context import ContextWindow
+from utils.internet_utils import InternetUtils
+from utils.tracing import get_tracer, PrometheusSink
+
+
+class Session:
+    """One conversation hosted by the server."""
+
+    def __init__(self, session_id, assistant):
+        """Wrap an assistant with the lock that serializes its turns."""
+        self.id = session_id
+        self.assistant = assistant
+        self.lock = asyncio.Lock()
+        self.created = time.time()
+        self.last_used = time.monotonic()
+        self.turns = 0
+
+    def touch(self):
+        """Mark the session as used now."""
+        self.last_used = time.monotonic()
+
+    def idle_for(self):
+        """Return the seconds since the session was last used."""
+        return time.monotonic() - self.last_used
+
+    def info(self):
+        """Return the session's metadata for API responses."""
+        return {
+            'session_id': self.id,
+            'created': self.created,
+            'turns': self.turns,
+            'idle_seconds': round(self.idle_for(), 1),
+            'busy': self.lock.locked(),
+        }
+
+
+class SessionManager:
+    """Hosts many FridayAssistant sessions over one shared OpenAI client, InternetUtils and answer cache.
+
+    Turns run on worker threads, with at most max_concurrent_llm model calls in
+    flight at a time (lookups don't hold a slot). Each session handles one turn at a time, and sessions idle for longer than
+    idle_timeout seconds are evicted so memory stays flat.
+    """
+
+    def __init__(self, api_key=None, serpapi_key=None, max_sessions=200, idle_timeout=1800,
+                 max_concurrent_llm=8, context_budget=8000):
+        """Create the shared clients. Sessions are created on demand."""
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("API key must be provided or set as OPENAI_API_KEY environment variable")
+
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_concurrent_llm = max_concurrent_llm
+        self.context_budget = context_budget
+
+        # Shared by every session: one HTTP connection pool for OpenAI, one for
+        # the internet providers, and one provider and answer cache
+        self.client = OpenAI(api_key=self.api_key)
+        self.internet = InternetUtils(serpapi_key)
+        self.answer_cache = TTLCache(max_entries=1024, max_bytes=8 * 1024 * 1024)
+        self.llm_slots = threading.BoundedSemaphore(max_concurrent_llm)
+        
+        # Per-stage latency and token metrics for every session, served at /metrics
+        self.metrics = get_tracer().add_sink(PrometheusSink())
+
+        # Least recently used first
+        self.sessions = OrderedDict()
+        self.evicted = 0
+        self._evictor = None
+
+    async def start(self):
+        """Start idle-session eviction. Must be called from the server's event loop."""
+        self._evictor = asyncio.create_task(self._evict_loop())
+
+    async def stop(self):
+        """Stop eviction, drop every session and close the shared clients."""
+        if self._evictor is not None:
+            self._evictor.cancel()
+        self.sessions.clear()
+        await asyncio.to_thread(self.internet.close)
+        await asyncio.to_thread(self.client.close)
+
+    def create(self):
+        """Create a new session, or return None if the server is full."""
+        if len(self.sessions) >= self.max_sessions:
+            self.evict_idle()
+        if len(self.sessions) >= self.max_sessions:
+            # Still full: make room by dropping the least recently used idle session
+            for session in self.sessions.values():
+                if not session.lock.locked():
+                    self._remove(session.id)
+                    self.evicted += 1
+                    break
+            else:
+                return None
+
+        assistant = FridayAssistant(self.api_key, context_budget=self.context_budget, answer_cache=self.answer_cache,
+                                    client=self.client, internet=self.internet, llm_slots=self.llm_slots)
+        session = Session(uuid.uuid4().hex, assistant)
+        self.sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        """Return a session by id, marking it as recently used, or None."""
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.touch()
+            self.sessions.move_to_end(session_id)
+        return session
+
+    def close(self, session_id):
+        """Drop a session and return whether it existed."""
+        return self._remove(session_id) is not None
+
+    def _remove(self, session_id):
+        """Remove a session from the table."""
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            # Summaries still being refreshed for this session are discarded
+            session.assistant.context.reset()
+        return session
+
+    async def ask(self, session, message, use_cache=True):
+        """Run one turn for a session and return the reply."""
+        # Turns of one session run one at a time; the assistant takes a model slot itself
+        async with session.lock:
+            reply = await asyncio.to_thread(session.assistant.ask, message, None, None, use_cache)
+            session.turns += 1
+            session.touch()
+        return reply
+
+    async def ask_stream(self, session, message, use_cache=True):
+        """Run one turn for a session, yielding the reply in chunks as it is generated.
+
+        If the consumer stops early (the client disconnected), the turn is cancelled
+        and nothing is added to the session's history.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        done = object()
+        cancel = CancelToken()
+
+        def produce():
+            """Drain the assistant's stream on a worker thread into the queue."""
+            try:
+                for delta in session.assistant.ask_stream(message, use_cache=use_cache, cancel=cancel):
+                    loop.call_soon_threadsafe(chunks.put_nowait, delta)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, done)
+
+        async with session.lock:
+            producer = asyncio.ensure_future(asyncio.to_thread(produce))
+            finished = False
+            try:
+                while True:
+                    delta = await chunks.get()
+                    if delta is done:
+                        finished = True
+                        break
+                    yield delta
+            finally:
+                if not finished:
+                    cancel.cancel()
+                # Keep the session locked until the worker thread has let go of the assistant
+                try:
+                    await producer
+                except RequestCancelled:
+                    pass
+            session.turns += 1
+            session.touch()
+
+    def evict_idle(self):
+        """Drop sessions idle for longer than idle_timeout and return how many were dropped."""
+        expired = [session.id for session in self.sessions.values()
+                   if session.idle_for() > self.idle_timeout and not session.lock.locked()]
+        for session_id in expired:
+            self._remove(session_id)
+        self.evicted += len(expired)
+        return len(expired)
+
+    async def _evict_loop(self):
+        """Periodically evict idle sessions."""
+        interval = max(1.0, min(60.0, self.idle_timeout / 2))
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    def status(self):
+        """Return session counts, model concurrency and shared cache and provider state."""
+        busy = sum(1 for session in self.sessions.values() if session.lock.locked())
+        return {
+            'sessions': len(self.sessions),
+            'busy_sessions': busy,
+            'max_sessions': self.max_sessions,
+            'evicted_sessions': self.evicted,
+            'max_concurrent_llm': self.max_concurrent_llm,
+            'providers': self.internet.provider_status(),
+            'lookup_cache': self.internet.cache.stats(),
+            'answer_cache': self.answer_cache.stats(),
+        }
+
+
+def session_or_404(request):
+    """Return the session named in the URL or raise 404."""
+    session = request.app['manager'].get(request.match_info['session_id'])
+    if session is None:
+        raise web.HTTPNotFound(text="Unknown session")
+    return session
+
+
+async def create_session(request):
+    """POST /sessions: start a conversation."""
+    session = request.app['manager'].create()
+    if session is None:
+        raise web.HTTPServiceUnavailable(text="Too many active sessions")
+    return web.json_response({'session_id': session.id, 'greeting': session.assistant.get_greeting()}, status=201)
+
+
+async def get_session(request):
+    """GET /sessions/{id}: session metadata and history."""
+    session = session_or_404(request)
+    info = session.info()
+    info['history'] = [ContextWindow.clean(message) for message in session.assistant.conversation_history[1:]]
+    return web.json_response(info)
+
+
+async def delete_session(request):
+    """DELETE /sessions/{id}: end a conversation."""
+    if not request.app['manager'].close(request.match_info['session_id']):
+        raise web.HTTPNotFound(text="Unknown session")
+    return web.Response(status=204)
+
+
+async def post_message(request):
+    """POST /sessions/{id}/messages: send a message and return or stream the reply."""
+    session = session_or_404(request)
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="Expected a JSON body")
+    message = body.get('message') if isinstance(body, dict) else None
+    if not isinstance(message, str) or not message.strip():
+        raise web.HTTPBadRequest(text="Expected a non-empty 'message'")
+
+    manager = request.app['manager']
+    use_cache = body.get('use_cache', True)
+    if not body.get('stream'):
+        reply = await manager.ask(session, message, use_cache)
+        return web.json_response({'session_id': session.id, 'reply': reply})
+
+    # Streamed replies are sent as chunked plain text
+    response = web.StreamResponse(headers={'Content-Type': 'text/plain; charset=utf-8'})
+    await response.prepare(request)
+    stream = manager.ask_stream(session, message, use_cache)
+    try:
+        async for delta in stream:
+            await response.write(delta.encode('utf-8'))
+    finally:
+        await stream.aclose()
+    await response.write_eof()
+    return response
+
+
+async def get_status(request):
+    """GET /status: server, cache and provider state."""
+    return web.json_response(request.app['manager'].status())
+
+
+async def get_metrics(request):
+    """GET /metrics: per-stage latency, token and cache metrics in Prometheus text format."""
+    return web.Response(text=request.app['manager'].metrics.render(), content_type='text/plain')
+
+
+def create_app(manager):
+    """Build the aiohttp application around a SessionManager."""
+    app = web.Application()
+    app['manager'] = manager
+
+    async def start_manager(app):
+        await manager.start()
+
+    async def stop_manager(app):
+        await manager.stop()
+
+    app.on_startup.append(start_manager)
+    app.on_cleanup.append(stop_manager)
+    app.add_routes([
+        web.post('/sessions', create_session),
+        web.get('/sessions/{session_id}', get_session),
+        web.delete('/sessions/{session_id}', delete_session),
+        web.post('/sessions/{session_id}/messages', post_message),
+        web.get('/status', get_status),
+        web.get('/metrics', get_metrics),
+    ])
+    return app
+
+
+def main():
+    """Run FRIDAY as a headless multi-session HTTP server."""
+    parser = argparse.ArgumentParser(description="Headless F.R.I.D.A.Y. server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Serve on a Unix socket at this path instead of TCP")
+    parser.add_argument("--max-sessions", type=int, default=200)
+    parser.add_argument("--idle-timeout", type=float, default=1800, help="Seconds before an idle session is evicted")
+    parser.add_argument("--max-concurrent-llm", type=int, default=8, help="Model calls allowed in flight at once")
+    parser.add_argument("--context-budget", type=int, default=8000)
+    args = parser.parse_args()
+
+    # Load environment variables from .env file
+    load_dotenv()
+
+    manager = SessionManager(serpapi_key=os.environ.get("SERPAPI_KEY"), max_sessions=args.max_sessions,
+                             idle_timeout=args.idle_timeout, max_concurrent_llm=args.max_concurrent_llm,
+                             context_budget=args.context_budget)
+    app = create_app(manager)
+
+    if args.unix:
+        web.run_app(app, path=args.unix)
+    else:
+        web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,89 @@
+import asyncio
+import hashlib
 import os
 import json
+import re
 import time
 import random
-import re  # Add this line
 from datetime import datetime
 from openai import OpenAI
 from .internet_utils import InternetUtils
+from .context import ContextWindow
+from .intent_router import IntentRouter
+from .cache import TTLCache
+from .journal import ConversationJournal
+from .tracing import get_tracer
+from .cancel import RequestCancelled
 
 class FridayAssistant:
-    def __init__(self, api_key=None, serpapi_key=None, weather_key=None, news_key=None, stock_key=None):
-        """Initialize Friday Assistant with API keys."""
+    # Reported instead of calling a provider whose circuit breaker is open
+    PROVIDER_DOWN = "the service is temporarily unavailable"
+    
+    # Start of the reply given when the model call fails
+    SYSTEM_ERROR = "I'm experiencing a system error"
+    
+    # Marks a lookup section that did not produce usable data
+    LOOKUP_FAILED = "lookup attempted but failed"
+    
+    # Cache namespace whose TTL bounds the freshness of answers built on each intent
+    INTENT_NAMESPACES = {
+        'weather': 'weather',
+        'news': 'news',
+        'portfolio': 'stock',
+        'stock': 'stock',
+        'search': 'search',
+    }
+    
+    def __init__(self, api_key=None, serpapi_key=None, weather_key=None, news_key=None, stock_key=None,
+                 context_budget=8000, answer_cache=None, cache_conversational=False, client=None, internet=None,
+                 journal_path=None, llm_slots=None):
+        """Initialize Friday Assistant with API keys.
+        
+        An existing OpenAI client and InternetUtils can be passed in so several
+        assistants share one connection pool and cache, and a threading.Semaphore
+        passed as llm_slots bounds how many of them call the model at once. If
+        journal_path is set, every message is appended to that journal and the
+        conversation resumes from it.
+        """
         # OpenAI API key setup
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("API key must be provided or set as OPENAI_API_KEY environment variable")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = client if client is not None else OpenAI(api_key=self.api_key)
         self.conversation_history = []
         
-        # Initialize internet utilities
-        self.internet = InternetUtils(serpapi_key)
+        # Keeps each request within a token budget, summarizing older turns
+        self.context = ContextWindow(self.client, budget=context_budget)
+        
+        # Initialize internet utilities and the intent router that decides when to use them
+        self.internet = internet if internet is not None else InternetUtils(serpapi_key)
+        self.router = IntentRouter()
+        
+        # Optional semaphore shared with other assistants that caps concurrent model calls
+        self.llm_slots = llm_slots
+        
+        # Per-stage timing and token usage for each turn
+        self.tracer = get_tracer()
+        self.model = "gpt-4-turbo"
+        
+        # Search enrichment: how many result pages to fetch, the overall deadline
+        # in seconds, and how many characters to keep from each page
+        self.enrichment_pages = 3
+        self.enrichment_deadline = 4.0
+        self.enrichment_excerpt_length = 800
+        
+        # Cache of final answers keyed on the normalized query, the internet data it
+        # used and the user's earlier messages (the last answer_cache_window of them, or
+        # all when None), since the reply was written with them in context. Conversational
+        # turns (no internet intent) are only cached when cache_conversational is set.
+        self.answer_cache = answer_cache if answer_cache is not None else TTLCache(max_entries=256, max_bytes=2 * 1024 * 1024)
+        self.answer_cache_window = None
+        self.cache_conversational = cache_conversational
+        self.conversational_answer_ttl = 300
+        
+        # How long a stock question waits on the rate-limited quote queue
+        self.stock_batch_deadline = 15.0
         
         # Store other API keys in environment variables for the internet utils to use
         if weather_key:
@@ -61,6 +125,12 @@ class FridayAssistant:
         # Add system message to conversation history
         self.conversation_history.append({"role": "system", "content": self.system_message})
         
+        # Append-only journal of the conversation; resume from its tail if it has one
+        self.journal = None
+        if journal_path:
+            self.journal = ConversationJournal(journal_path)
+            self.resume_journal()
+        
         # Friday's greeting phrases
         self.greetings = [
             "Hello Boss. FRIDAY at your service. How can I assist you today?",
@@ -87,99 +157,353 @@ class FridayAssistant:
         """Return a random acknowledgement phrase."""
         return random.choice(self.acknowledgements)
     
-    def ask(self, user_input, callback=None):
-        """Send user input to OpenAI and return Friday's response."""
-        # Check for special commands that might need internet capabilities
-        enhanced_input, internet_data = self._check_for_internet_queries(user_input)
+    def ask(self, user_input, callback=None, on_delta=None, use_cache=True, cancel=None):
+        """Send user input to OpenAI and return Friday's response.
         
-        # Add user message to conversation history
-        self.conversation_history.append({"role": "user", "content": user_input})
+        If on_delta is given, the reply is streamed and on_delta is called with
+        each chunk of text as it arrives. Pass use_cache=False to always ask the
+        model instead of reusing a cached answer. If the CancelToken cancel is
+        cancelled, the lookups and the model stream are closed, nothing is added
+        to the history and RequestCancelled is raised.
+        """
+        if on_delta is not None or cancel is not None:
+            parts = []
+            for delta in self.ask_stream(user_input, callback, use_cache, cancel):
+                if on_delta is not None:
+                    on_delta(delta)
+                parts.append(delta)
+            return "".join(parts)
         
-        # If callback is provided, send acknowledgement
-        if callback:
-            callback(self.get_acknowledgement())
+        with self.tracer.trace("ask", streamed=False):
+            return self._ask(user_input, callback, use_cache)
+    
+    def _ask(self, user_input, callback, use_cache):
+        """Run one blocking turn inside the current trace."""
+        messages, answer_key, answer_ttl, user_message = self._start_turn(user_input, callback, use_cache)
+        
+        # Reuse a cached answer to the same question over the same data
+        cached = self._cached_answer(answer_key)
+        if cached is not None:
+            self._finish_turn(user_message, cached)
+            return cached
         
         try:
-            # Prepare messages including internet data if applicable
-            messages = self.conversation_history.copy()
-            
-            # If we have internet data, add it as a system message
-            if internet_data:
-                messages.append({
-                    "role": "system", 
-                    "content": f"I've accessed the internet and found this information: {internet_data}\n\nPlease incorporate this information into your response while maintaining your FRIDAY persona. Do not explicitly state that this came from a system message."
-                })
-            
             # Get response from OpenAI
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo",
-                messages=messages,
-                max_tokens=1500,  # Increased tokens to handle more complex responses with internet data
-                temperature=0.7,
-            )
+            with self.tracer.span("llm", model=self.model) as span:
+                held = self._acquire_llm_slot(span)
+                try:
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=1500,  # Increased tokens to handle more complex responses with internet data
+                        temperature=0.7,
+                    )
+                finally:
+                    if held:
+                        self.llm_slots.release()
+                self._record_usage(span, getattr(response, "usage", None))
             
             # Extract assistant's reply
             assistant_reply = response.choices[0].message.content
             
-            # Add assistant's reply to conversation history
-            self.conversation_history.append({"role": "assistant", "content": assistant_reply})
+            # Add the turn to conversation history
+            self._finish_turn(user_message, assistant_reply)
             
+            if answer_key:
+                self.answer_cache.set(answer_key, assistant_reply, ttl=answer_ttl)
             return assistant_reply
         except Exception as e:
-            error_message = f"I'm experiencing a system error: {str(e)}. Shall I run diagnostics?"
-            self.conversation_history.append({"role": "assistant", "content": error_message})
+            error_message = f"{self.SYSTEM_ERROR}: {str(e)}. Shall I run diagnostics?"
+            self._finish_turn(user_message, error_message)
             return error_message
+    
+    def ask_stream(self, user_input, callback=None, use_cache=True, cancel=None):
+        """Send user input to OpenAI and yield Friday's response in chunks as it is generated.
+        
+        Cancelling the CancelToken cancel aborts the lookups or closes the model
+        stream, and the generator raises RequestCancelled without recording the turn.
+        """
+        # The trace spans the whole generator, so it is only made current while this code runs
+        trace = self.tracer.start_trace("ask", streamed=True)
+        try:
+            with self.tracer.activate(trace):
+                messages, answer_key, answer_ttl, user_message = self._start_turn(user_input, callback, use_cache, cancel)
+                
+                # A cached answer is delivered as a single chunk
+                cached = self._cached_answer(answer_key)
+            if cached is not None:
+                self._finish_turn(user_message, cached)
+                yield cached
+                return
+            if cancel is not None:
+                cancel.check()
+            
+            parts = []
+            llm = trace.child("llm", model=self.model)
+            started = time.perf_counter()
+            stream = None
+            remove = None
+            held = False
             
-    def _check_for_internet_queries(self, user_input):
+            try:
+                # The slot is held until the stream is drained, not just while it opens
+                held = self._acquire_llm_slot(llm, cancel)
+                started = time.perf_counter()
+                stream = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=1500,
+                    temperature=0.7,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                
+                # Closing the response from the cancelling thread unblocks a pending read
+                if cancel is not None:
+                    remove = cancel.on_cancel(stream.close)
+                
+                for chunk in stream:
+                    if cancel is not None and cancel.cancelled:
+                        break
+                    # With include_usage the final chunk carries token counts and no choices
+                    self._record_usage(llm, getattr(chunk, "usage", None))
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if not parts:
+                            llm.set(first_token_ms=round((time.perf_counter() - started) * 1000, 3))
+                        parts.append(delta)
+                        yield delta
+                
+                if cancel is not None:
+                    cancel.check()
+                
+                # Add the turn with the assembled reply to conversation history
+                assistant_reply = "".join(parts)
+                self._finish_turn(user_message, assistant_reply)
+                
+                if answer_key:
+                    self.answer_cache.set(answer_key, assistant_reply, ttl=answer_ttl)
+            except Exception as e:
+                # Errors from a stream closed by cancel() are part of the cancellation
+                if isinstance(e, RequestCancelled) or (cancel is not None and cancel.cancelled):
+                    llm.set(cancelled=True)
+                    raise RequestCancelled() from None
+                llm.set(error=type(e).__name__)
+                error_message = f"{self.SYSTEM_ERROR}: {str(e)}. Shall I run diagnostics?"
+                if parts:
+                    error_message = "\n\n" + error_message
+                parts.append(error_message)
+                self._finish_turn(user_message, "".join(parts))
+                yield error_message
+            finally:
+                # Release the connection even if the consumer stopped iterating early
+                if remove is not None:
+                    remove()
+                if stream is not None:
+                    stream.close()
+                if held:
+                    self.llm_slots.release()
+                llm.finish()
+        except RequestCancelled:
+            trace.set(cancelled=True)
+            raise
+        finally:
+            self.tracer.finish_trace(trace)
+    
+    def _acquire_llm_slot(self, span, cancel=None):
+        """Wait for one of the shared llm_slots, if any, and return whether one was taken."""
+        if self.llm_slots is None:
+            return False
+        queued = time.perf_counter()
+        while not self.llm_slots.acquire(timeout=0.1):
+            if cancel is not None:
+                cancel.check()
+        span.set(queued_ms=round((time.perf_counter() - queued) * 1000, 3))
+        return True
+    
+    @staticmethod
+    def _record_usage(span, usage):
+        """Copy token counts from an OpenAI usage object onto a span."""
+        if usage is not None:
+            span.set(prompt_tokens=getattr(usage, "prompt_tokens", None),
+                     completion_tokens=getattr(usage, "completion_tokens", None))
+    
+    def _start_turn(self, user_input, callback=None, use_cache=True, cancel=None):
+        """Gather internet data and build the messages for a turn.
+        
+        Returns the messages to send, the answer cache key and TTL for this turn
+        (both None if the answer should not be cached) and the user's message.
+        The message is not recorded yet; _finish_turn records it with the reply,
+        so a cancelled turn leaves nothing in the history.
+        """
+        with self.tracer.span("route") as span:
+            intents = self.router.route(user_input)
+            span.set(intents=[intent.type for intent in intents])
+        
+        # Check for special commands that might need internet capabilities
+        enhanced_input, internet_data = self._check_for_internet_queries(user_input, intents, cancel)
+        
+        # The cache key covers the conversation before this turn, so compute it first
+        answer_key, answer_ttl = None, None
+        if use_cache:
+            answer_key, answer_ttl = self._answer_cache_key(user_input, internet_data, intents)
+        
+        user_message = {"role": "user", "content": user_input}
+        
+        # If callback is provided, send acknowledgement
+        if callback:
+            callback(self.get_acknowledgement())
+        
+        # If we have internet data, add it as a system message
+        extra_messages = []
+        if internet_data:
+            extra_messages.append({
+                "role": "system", 
+                "content": f"I've accessed the internet and found this information: {internet_data}\n\nPlease incorporate this information into your response while maintaining your FRIDAY persona. Do not explicitly state that this came from a system message."
+            })
+        
+        # Prepare messages: system prompt, rolling summary and the recent turns that fit the budget
+        with self.tracer.span("context") as span:
+            messages = self.context.build(self.conversation_history + [user_message], extra_messages)
+            span.set(messages=len(messages))
+        return messages, answer_key, answer_ttl, user_message
+    
+    def _finish_turn(self, user_message, reply):
+        """Record a completed turn: the user's message and the reply."""
+        self._record(user_message)
+        self._record({"role": "assistant", "content": reply})
+    
+    def _answer_cache_key(self, user_input, internet_data, intents=None):
+        """Return the answer cache key and TTL for a turn, or (None, None) if it is not cacheable."""
+        if intents is None:
+            intents = self.router.route(user_input)
+        if not intents and not self.cache_conversational:
+            return None, None
+        
+        # Answers built on failed lookups should be retried, not replayed
+        if internet_data and any(marker in internet_data for marker in (self.LOOKUP_FAILED, self.PROVIDER_DOWN, "queued behind")):
+            return None, None
+        
+        # An answer is only as fresh as the provider data behind it
+        if intents:
+            ttl = min(self.internet.cache.ttl_for(self.INTENT_NAMESPACES[intent.type]) for intent in intents)
+        else:
+            ttl = self.conversational_answer_ttl
+        
+        # Only user-side context goes into the key, since replies vary from run to run.
+        # Answer caches shared between sessions then never mix conversations.
+        normalized = " ".join(re.sub(r"[^\w\s]", " ", user_input.lower()).split())
+        window = [message.get("content") for message in self.conversation_history[1:] if message["role"] == "user"]
+        if self.answer_cache_window is not None:
+            window = window[-self.answer_cache_window:] if self.answer_cache_window else []
+        digest = hashlib.sha256(json.dumps([normalized, internet_data, window]).encode()).hexdigest()
+        return f"answer_{digest}", ttl
+    
+    def _cached_answer(self, answer_key):
+        """Return a cached answer, or None on a miss."""
+        if not answer_key:
+            return None
+        
+        with self.tracer.span("answer_cache") as span:
+            cached = self.answer_cache.get(answer_key)
+            span.set(cache="hit" if cached is not None else "miss")
+        return cached
+    
+    def answer_cache_stats(self):
+        """Return hit/miss/eviction statistics for the answer cache."""
+        return self.answer_cache.stats()
+    
+    def warm_up(self, location=None, news_category=None, watchlist=None, deadline=10.0):
+        """Open the OpenAI and provider connections ahead of the first question.
+        
+        The provider warm-up (see InternetUtils.warm_up) runs on the lookup loop
+        while this thread lists models, which sets up the OpenAI client's
+        connection pool. location, news_category and watchlist default to
+        FRIDAY_HOME_LOCATION, FRIDAY_NEWS_CATEGORY and FRIDAY_WATCHLIST
+        (comma-separated symbols). Returns a dict of step name to "ok" or the
+        error message.
+        """
+        location = location or os.environ.get("FRIDAY_HOME_LOCATION")
+        news_category = news_category or os.environ.get("FRIDAY_NEWS_CATEGORY")
+        if watchlist is None:
+            watchlist = [symbol for symbol in os.environ.get("FRIDAY_WATCHLIST", "").split(",") if symbol.strip()]
+        
+        status = {}
+        with self.tracer.trace("warm_up"):
+            lookups = self.internet.submit(self.internet.warm_up_async(location, news_category, watchlist, deadline))
+            
+            with self.tracer.span("connect.openai"):
+                try:
+                    self.client.with_options(timeout=deadline, max_retries=0).models.list()
+                    status["connect.openai"] = "ok"
+                except Exception as e:
+                    status["connect.openai"] = f"Warm-up error: {str(e)}"
+            
+            try:
+                status.update(lookups.result(deadline + 5))
+            except Exception as e:
+                status["internet"] = f"Warm-up error: {str(e)}"
+        return status
+            
+    def _check_for_internet_queries(self, user_input, intents=None, cancel=None):
         """Check if the user input requires internet access and fetch relevant data."""
-        user_input_lower = user_input.lower()
         internet_data = None
         
-        # Check for weather queries
-        weather_patterns = [
-            r'weather\s+in\s+([a-zA-Z\s]+)',
-            r'weather\s+(?:for|at)\s+([a-zA-Z\s]+)',
-            r'what\'s\s+the\s+weather\s+(?:in|at|for)\s+([a-zA-Z\s]+)',
-            r'how\'s\s+the\s+weather\s+(?:in|at|for)\s+([a-zA-Z\s]+)'
-        ]
+        # Detect every intent in the message and look them all up concurrently
+        if intents is None:
+            intents = self.router.route(user_input)
+        if intents:
+            with self.tracer.span("lookups"):
+                sections = self.internet.run(self._gather_lookups(intents), cancel=cancel)
+            internet_data = "\n\n".join(section for section in sections if section) or None
         
-        for pattern in weather_patterns:
-            match = re.search(pattern, user_input_lower)
-            if match:
-                location = match.group(1).strip()
-                weather_data = self.internet.get_weather(location)
-                if isinstance(weather_data, dict):
-                    internet_data = f"Weather information for {weather_data['location']}: Temperature is {weather_data['temperature']} (feels like {weather_data['feels_like']}), {weather_data['description']}, humidity {weather_data['humidity']}, wind speed {weather_data['wind_speed']}."
-                else:
-                    internet_data = f"Weather lookup attempted but failed: {weather_data}"
-                break
-        
-        # Check for news queries
-        news_patterns = [
-            r'(latest|recent|current)\s+news',
-            r'news\s+(?:about|on)\s+([a-zA-Z\s]+)',
-            r'what\'s\s+(?:happening|going\s+on)',
-            r'current\s+events'
-        ]
-
-        for pattern in news_patterns:
-            if re.search(pattern, user_input_lower) and not internet_data:
-                topic_match = re.search(r'news\s+(?:about|on)\s+([a-zA-Z\s]+)', user_input_lower)
-                topic = "general"
-                if topic_match:
-                    topic = topic_match.group(1).strip()
-                
-                news_data = self.internet.get_news(topic, 3)
-                if isinstance(news_data, list) and news_data:
-                    # Just collect the raw news data
-                    news_text = "News data:\n"
-                    for article in news_data:
-                        news_text += f"Title: {article['title']}\n"
-                        news_text += f"Source: {article['source']}\n"
-                        news_text += f"Description: {article.get('description', 'No description available')}\n\n"
-                    
-                    # Add specific instructions for the model to process this data
-                    internet_data = f"""
+        return user_input, internet_data
+    
+    async def _gather_lookups(self, intents):
+        """Run the lookup for each intent concurrently and return their results in order."""
+        results = await asyncio.gather(
+            *(self._traced_lookup(intent) for intent in intents),
+            return_exceptions=True
+        )
+        
+        sections = []
+        for intent, result in zip(intents, results):
+            if isinstance(result, Exception):
+                result = f"{intent.type.capitalize()} {self.LOOKUP_FAILED}: {str(result)}"
+            sections.append(result)
+        return sections
+    
+    async def _traced_lookup(self, intent):
+        """Run the lookup handler for an intent inside its own span."""
+        with self.tracer.span(f"lookup.{intent.type}"):
+            return await getattr(self, f"_lookup_{intent.type}")(**intent.entities)
+    
+    async def _lookup_weather(self, location):
+        """Fetch weather for a location and phrase it in FRIDAY's voice."""
+        weather_data = await self.internet.get_weather_async(location) if self.internet.is_available('weather') else self.PROVIDER_DOWN
+        if not isinstance(weather_data, dict):
+            return f"Weather {self.LOOKUP_FAILED}: {weather_data}"
+        
+        details = f"Temperature is {weather_data['temperature']} (feels like {weather_data['feels_like']}), {weather_data['description']}, humidity {weather_data['humidity']}, wind speed {weather_data['wind_speed']}."
+        return f"I've analyzed atmospheric conditions for {weather_data['location']}, Boss. {details} Would you like me to set up a weather monitoring protocol?"
+    
+    async def _lookup_news(self, topic):
+        """Fetch headlines for a topic along with instructions for summarizing them."""
+        news_data = await self.internet.get_news_async(topic, 3) if self.internet.is_available('news') else self.PROVIDER_DOWN
+        if not (isinstance(news_data, list) and news_data):
+            return f"News {self.LOOKUP_FAILED}: {news_data}"
+        
+        # Just collect the raw news data
+        news_text = "News data:\n"
+        for article in news_data:
+            news_text += f"Title: {article['title']}\n"
+            news_text += f"Source: {article['source']}\n"
+            news_text += f"Description: {article.get('description', 'No description available')}\n\n"
+        
+        # Add specific instructions for the model to process this data
+        return f"""
                     {news_text}
                     
                     INSTRUCTION: Using the news data above, create a natural, conversational summary of current events.
@@ -189,123 +513,130 @@ class FridayAssistant:
                     Include 3-5 major news topics in your own words, not just repeating the headlines.
                     End with an offer to provide more details on any topic that might interest the user.
                     """
-                else:
-                    internet_data = f"News lookup attempted but failed: {news_data}"
-                break
-        
-        # Check for stock queries
-        stock_patterns = [
-            r'stock\s+(?:price|value|info)?\s+(?:for|of)\s+([A-Za-z]+)',
-            r'how\s+is\s+([A-Za-z]+)\s+stock',
-            r'what\'s\s+([A-Za-z]+)\s+stock\s+(?:price|doing)'
-        ]
+    
+    async def _lookup_portfolio(self, symbols):
+        """Fetch quotes for several symbols through the paced batch API."""
+        if self.internet.is_available('stock'):
+            quotes = await self.internet.check_stocks_async(symbols, self.stock_batch_deadline)
+        else:
+            quotes = {symbol: self.PROVIDER_DOWN for symbol in symbols}
         
-        for pattern in stock_patterns:
-            match = re.search(pattern, user_input_lower)
-            if match and not internet_data:
-                symbol = match.group(1).upper().strip()
-                stock_data = self.internet.check_stock(symbol)
-                if isinstance(stock_data, dict):
-                    internet_data = f"Stock information for {stock_data['symbol']}: Current price ${stock_data['price']}, change {stock_data['change']} ({stock_data['change_percent']}), volume {stock_data['volume']}, last trading day {stock_data['last_trading_day']}."
-                else:
-                    internet_data = f"Stock lookup attempted but failed: {stock_data}"
-                break
-        
-        # General web search for informational queries
-        search_patterns = [
-            r'search\s+(?:for|about)\s+([a-zA-Z0-9\s]+)',
-            r'find\s+(?:info|information)\s+(?:about|on)\s+([a-zA-Z0-9\s]+)',
-            r'who\s+is\s+([a-zA-Z\s]+)',
-            r'what\s+is\s+([a-zA-Z0-9\s]+)',
-            r'tell\s+me\s+about\s+([a-zA-Z0-9\s]+)',
-            r'how\s+(?:to|do|does|can)\s+([a-zA-Z0-9\s]+)'
-        ]
+        lines = []
+        for symbol, stock_data in quotes.items():
+            if isinstance(stock_data, dict):
+                lines.append(f"{stock_data['symbol']}: price ${stock_data['price']}, change {stock_data['change']} ({stock_data['change_percent']}), volume {stock_data['volume']}, last trading day {stock_data['last_trading_day']}.")
+            else:
+                lines.append(f"{symbol}: {self.LOOKUP_FAILED}: {stock_data}")
+        return "Portfolio information:\n" + "\n".join(lines)
+    
+    async def _lookup_stock(self, symbol):
+        """Fetch a stock quote and phrase it in FRIDAY's voice."""
+        stock_data = await self.internet.check_stock_async(symbol, self.stock_batch_deadline) if self.internet.is_available('stock') else self.PROVIDER_DOWN
+        if not isinstance(stock_data, dict):
+            return f"Stock {self.LOOKUP_FAILED}: {stock_data}"
         
-        for pattern in search_patterns:
-            match = re.search(pattern, user_input_lower)
-            if match and not internet_data:
-                query = match.group(1).strip()
-                search_results = self.internet.search_web(query, 3)
-                
-                if search_results and isinstance(search_results, list):
-                    search_text = f"Web search results for '{query}':\n"
-                    for i, result in enumerate(search_results):
-                        search_text += f"{i+1}. {result['title']}: {result['snippet']}\n"
-                    
-                    # If we have a good first result, try to get more content
-                    if search_results[0]['link'] != '#':
-                        content = self.internet.fetch_webpage_content(search_results[0]['link'], 1500)
-                        if content and not content.startswith("Error"):
-                            search_text += f"\nDetails from top result:\n{content[:800]}..."
-                    
-                    internet_data = search_text
-                break
-
-        if internet_data:
-            # Transform raw internet data into FRIDAY's voice
-            if "Weather information for" in internet_data:
-                location = internet_data.split("Weather information for ")[1].split(":")[0]
-                details = internet_data.split(": ")[1]
-                internet_data = f"I've analyzed atmospheric conditions for {location}, Boss. {details} Would you like me to set up a weather monitoring protocol?"
-            
-            elif "Recent news headlines" in internet_data:
-                # Don't format the news data at all - just provide it as context
-                news_raw = internet_data
-                
-                # Create a specific instruction for the model to analyze and summarize
-                internet_data = f"""
-                {news_raw}
-                
-                INSTRUCTION: Using the news data above, create a natural, conversational summary of current events.
-                Do NOT use numbering, bullet points, or bold formatting in your response.
-                Speak as FRIDAY from Marvel, casually briefing Tony Stark on what's happening in the world.
-                
-                For each news item:
-                1. Explain it in simple, clear terms that are easy to understand
-                2. Briefly mention what led to this situation (context)
-                3. Add a short analysis of potential impacts or why it matters
-                
-                Make your analysis insightful but accessible - Boss values clarity and efficiency.
-                Use FRIDAY's helpful, slightly sassy personality and address the user as 'Boss'.
-                Include 3-4 major news topics only.
-                End with an offer to provide more details on any topic that might interest the user.
-                """
-            elif "Stock information for" in internet_data:
-                symbol = internet_data.split("Stock information for ")[1].split(":")[0]
-                details = internet_data.split(": ")[1]
-                internet_data = f"Boss, I've accessed financial networks for {symbol}. {details} Shall I activate continuous monitoring for this security?"
-            
-            elif "Web search results for" in internet_data:
-                query = internet_data.split("Web search results for '")[1].split("'")[0]
-                results = internet_data.split(":\n", 1)[1] if ":\n" in internet_data else internet_data
-                internet_data = f"I've conducted a sweep of available data on {query}, Boss. Here's what I've found:\n\n{results}\n\nI can dig deeper if needed. Would you like me to expand on any particular aspect?"
+        details = f"Current price ${stock_data['price']}, change {stock_data['change']} ({stock_data['change_percent']}), volume {stock_data['volume']}, last trading day {stock_data['last_trading_day']}."
+        return f"Boss, I've accessed financial networks for {stock_data['symbol']}. {details} Shall I activate continuous monitoring for this security?"
+    
+    async def _lookup_search(self, query):
+        """Search the web, enrich with the top result pages and phrase it in FRIDAY's voice."""
+        if not (self.internet.is_available('serpapi') or self.internet.is_available('duckduckgo')):
+            return f"Web search for '{query}' skipped: {self.PROVIDER_DOWN}"
         
-        return user_input, internet_data
+        search_results = await self.internet.search_web_async(query, 3)
+        if not (search_results and isinstance(search_results, list)):
+            return None
+        if search_results[0]['title'] == self.internet.SEARCH_ERROR_TITLE:
+            return f"Web search {self.LOOKUP_FAILED}: {search_results[0]['snippet']}"
+        
+        results = ""
+        for i, result in enumerate(search_results):
+            results += f"{i+1}. {result['title']}: {result['snippet']}\n"
+        
+        # Fetch the top result pages concurrently and keep whatever arrives in time
+        links = [result['link'] for result in search_results[:self.enrichment_pages] if result['link'] != '#']
+        pages = await self.internet.fetch_pages_async(links, 1500, self.enrichment_deadline)
+        for link, content in pages:
+            results += f"\nDetails from {link}:\n{content[:self.enrichment_excerpt_length]}...\n"
+        
+        return f"I've conducted a sweep of available data on {query}, Boss. Here's what I've found:\n\n{results}\n\nI can dig deeper if needed. Would you like me to expand on any particular aspect?"
+    
+    def _record(self, message):
+        """Add a message to the conversation history and the journal."""
+        self.conversation_history.append(message)
+        if self.journal is not None:
+            try:
+                self.journal.append(message)
+            except (OSError, ValueError) as e:
+                print(f"Journal write error: {str(e)}")
+    
+    def resume_journal(self):
+        """Load the journal's latest turns, reading back only as far as the context budget needs."""
+        budget = self.context.budget - self.context.count_tokens(self.conversation_history[0])
+        used = [0]
+        
+        def fits(message):
+            used[0] += self.context.count_tokens(message)
+            return used[0] <= budget
+        
+        self.conversation_history = [self.conversation_history[0]] + self.journal.tail(fits)
+        self.context.reset()
+        return len(self.conversation_history) - 1
+    
+    def compact_journal(self, keep=None):
+        """Rewrite the journal without cleared turns, optionally keeping only the last keep messages."""
+        if self.journal is None:
+            return 0
+        return self.journal.compact(keep)
     
     def clear_history(self):
         """Clear conversation history except for the system message."""
         system_message = self.conversation_history[0]
         self.conversation_history = [system_message]
+        self.context.reset()
+        if self.journal is not None:
+            self.journal.clear()
     
     def save_conversation(self, filename=None):
-        """Save the current conversation to a JSON file."""
+        """Save the current conversation to a JSON file.
+        
+        With a journal the full conversation is exported from it, including
+        turns older than those resumed into memory.
+        """
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"friday_logs_{timestamp}.json"
+        
+        if self.journal is not None:
+            return self.journal.export(filename, header=[ContextWindow.clean(self.conversation_history[0])])
             
         with open(filename, 'w') as f:
-            json.dump(self.conversation_history, f, indent=2)
+            json.dump([ContextWindow.clean(message) for message in self.conversation_history], f, indent=2)
             
         return filename
             
     def load_conversation(self, filename):
-        """Load a conversation from a JSON file."""
-        if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                self.conversation_history = json.load(f)
-            return True
-        else:
+        """Load a conversation from a JSON file, or resume one from a .jsonl journal."""
+        if not os.path.exists(filename):
             return False
+        
+        if filename.endswith(".jsonl"):
+            if self.journal is not None:
+                self.journal.close()
+            self.journal = ConversationJournal(filename)
+            self.resume_journal()
+            return True
+        
+        with open(filename, 'r') as f:
+            self.conversation_history = json.load(f)
+        self.context.reset()
+        
+        # Start the journal over from the loaded conversation
+        if self.journal is not None:
+            self.journal.clear()
+            for message in self.conversation_history[1:]:
+                self.journal.append(message)
+        return True
     
     def analyze_sentiment(self, text):
         """Simple analysis to detect if user might be upset or stressed."""
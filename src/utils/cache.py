@@ -0,0 +1,246 @@
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-namespace TTLs and entry/byte limits.
+    
+    Entries stay servable as stale for max_stale seconds after they expire, so
+    callers using lookup() can answer immediately and refresh in the background.
+    """
+
+    # Default time-to-live in seconds for each namespace. The namespace of a key
+    # is its prefix before the first underscore, e.g. "weather_london" -> "weather".
+    DEFAULT_TTLS = {
+        'search': 600,
+        'webpage': 600,
+        'weather': 600,
+        'news': 600,
+        'stock': 300,
+    }
+
+    def __init__(self, ttls=None, default_ttl=600, max_entries=512, max_bytes=8 * 1024 * 1024,
+                 backing=None, max_stale=0):
+        """Initialize the cache with optional TTL overrides, size limits and a backing tier."""
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_stale = max_stale
+
+        # key -> (expires_at, stale_until, size, value), ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        # Optional slower tier (e.g. DiskCache) consulted on misses and written through on sets
+        self.backing = backing
+
+        # Counters for sizing the cache against real traffic
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.backing_hits = 0
+        self.stale_hits = 0
+
+    @staticmethod
+    def namespace_of(key):
+        """Return the namespace part of a cache key."""
+        return key.split('_', 1)[0]
+
+    def ttl_for(self, key):
+        """Return the TTL in seconds that applies to a key."""
+        return self.ttls.get(self.namespace_of(key), self.default_ttl)
+
+    @staticmethod
+    def _estimate_size(key, value):
+        """Roughly estimate the memory footprint of an entry in bytes."""
+        try:
+            payload = json.dumps(value, default=str)
+        except (TypeError, ValueError):
+            payload = str(value)
+        return sys.getsizeof(key) + sys.getsizeof(payload)
+
+    def get(self, key, default=None):
+        """Return the cached value for a key, or default if missing or expired."""
+        found = self._lookup(key, allow_stale=False)
+        return default if found is None else found[0]
+
+    def lookup(self, key, backing=True):
+        """Return (value, is_fresh) for a fresh or still-servable stale entry, or None.
+
+        With backing=False only a fresh in-memory entry is returned and a miss is
+        not counted, so callers can try memory inline before the backing tier.
+        """
+        return self._lookup(key, allow_stale=True, backing=backing)
+
+    def peek(self, key):
+        """Return (value, is_fresh) for a servable in-memory entry, or None.
+
+        Unlike lookup, this never touches the backing tier, the counters or the LRU order.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now >= entry[1]:
+                return None
+            return entry[3], now < entry[0]
+
+    def extend(self, key, ttl):
+        """Make an in-memory entry fresh for ttl more seconds, within its staleness limit."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, stale_until, size, value = entry
+                self._entries[key] = (min(time.time() + ttl, stale_until), stale_until, size, value)
+
+    def _lookup(self, key, allow_stale, backing=True):
+        """Find an entry in memory, then in the backing tier, updating the counters."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, stale_until, size, value = entry
+                if now < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value, True
+                if now >= stale_until:
+                    self._remove(key)
+                    self.expirations += 1
+        if not backing:
+            return None
+
+        # Fall through to the backing tier outside the lock so disk I/O never blocks other readers
+        if self.backing is not None:
+            found = self.backing.get(key)
+            if found is not None:
+                value, expires_at = found
+                self._store(key, value, expires_at, expires_at + self.max_stale)
+                with self._lock:
+                    self.hits += 1
+                    self.backing_hits += 1
+                return value, True
+
+        with self._lock:
+            entry = self._entries.get(key) if allow_stale else None
+            if entry is not None and now < entry[1]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.stale_hits += 1
+                return entry[3], False
+            self.misses += 1
+        return None
+
+    def set(self, key, value, ttl=None, max_stale=None, persist=True):
+        """Store a value, evicting least recently used entries to stay within limits.
+        
+        max_stale overrides how long the entry may be served stale after it
+        expires, and persist=False keeps it out of the backing tier.
+        """
+        if ttl is None:
+            ttl = self.ttl_for(key)
+        if max_stale is None:
+            max_stale = self.max_stale
+        expires_at = time.time() + ttl
+
+        self._store(key, value, expires_at, expires_at + max_stale)
+        if persist and self.backing is not None:
+            self.backing.set(key, value, expires_at, self.namespace_of(key))
+
+    def _store(self, key, value, expires_at, stale_until):
+        """Store a value in memory with absolute expiry and staleness timestamps."""
+        size = self._estimate_size(key, value)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            # Values larger than the whole budget are never worth caching
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (expires_at, stale_until, size, value)
+            self._bytes += size
+            self._evict()
+
+    def delete(self, key):
+        """Remove a key from the cache if present."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+        if self.backing is not None:
+            self.backing.delete(key)
+
+    def warm_start(self, limit=None):
+        """Load unexpired entries from the backing tier into memory and return the count."""
+        if self.backing is None:
+            return 0
+
+        if limit is None:
+            limit = self.max_entries
+        rows = self.backing.load_unexpired(limit)
+
+        # Rows arrive freshest first; insert oldest first so the freshest end up most recently used
+        for key, value, expires_at in reversed(rows):
+            self._store(key, value, expires_at, expires_at + self.max_stale)
+        return len(rows)
+
+    def clear(self):
+        """Remove all in-memory entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def purge_expired(self):
+        """Drop all entries past their staleness limit and return how many were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, stale_until, _, _) in self._entries.items() if now >= stale_until]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+            return len(expired)
+
+    def _remove(self, key):
+        """Remove an entry and update the byte count. Caller must hold the lock."""
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self):
+        """Evict LRU entries until both limits are met. Caller must hold the lock."""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def stats(self):
+        """Return a snapshot of cache size and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'backing_hits': self.backing_hits,
+                'stale_hits': self.stale_hits,
+            }
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.time() < entry[0]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
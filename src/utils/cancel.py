@@ -0,0 +1,61 @@
+import threading
+
+
+class RequestCancelled(Exception):
+    """Raised when a request is abandoned through its CancelToken."""
+
+    def __init__(self, message="Request cancelled"):
+        super().__init__(message)
+
+
+class CancelToken:
+    """Lets one thread abort a request running on another.
+
+    Code doing cancellable work registers callbacks with on_cancel() (e.g. to
+    cancel a future or close a response stream) and calls check() between
+    steps. cancel() runs the callbacks once, on the cancelling thread.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """Cancel the request and run its registered callbacks."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancel callback error: {str(e)}")
+
+    def on_cancel(self, callback):
+        """Register callback to run on cancel (at once if already cancelled).
+
+        Returns a function that unregisters it, for when the work finishes first.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self):
+        """Raise RequestCancelled if the request has been cancelled."""
+        if self._event.is_set():
+            raise RequestCancelled()
@@ -0,0 +1,184 @@
+import tkinter as tk
+
+
+class ChatView:
+    """Shows a bounded window of recent messages in a scrolled Text widget.
+
+    Every message is kept as plain data in self.entries, but only
+    entries[first:rendered] are in the widget. Once more than `window` messages
+    are shown and the view is at the bottom, the oldest are dropped from the
+    widget; scrolling to the top pages them back in, page_size at a time.
+    Loaded conversations are rendered chunk_size messages per main-loop turn.
+
+    All methods must run on the Tk main loop (see UIQueue).
+    """
+
+    def __init__(self, root, text_widget, window=200, page_size=50, chunk_size=20):
+        self.root = root
+        self.widget = text_widget
+        self.window = window
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+
+        # [timestamp, sender, parts]; parts is a list of [text, tags]
+        self.entries = []
+        self.first = 0
+        self.rendered = 0
+        self._paging = False
+        self._render_id = None
+
+        # Watch the scroll position to know when the top is reached
+        self.vbar = getattr(text_widget, 'vbar', None)
+        text_widget.config(yscrollcommand=self._on_scroll)
+
+    def begin(self, sender, timestamp=""):
+        """Start a message with its timestamp and sender label."""
+        # Line accounting relies on every message starting on a fresh line
+        if self.entries and not self._ends_line(self.entries[-1]):
+            self.write(["\n", ()])
+
+        self.entries.append([timestamp, sender, []])
+        if self.rendered == len(self.entries) - 1:
+            at_bottom = self._at_bottom()
+            self._insert(tk.END, self._header(timestamp, sender))
+            self.rendered += 1
+            if at_bottom:
+                self._trim()
+            if at_bottom or sender == "You":
+                self.widget.see(tk.END)
+
+    def write(self, run):
+        """Append a run of alternating text, tags arguments to the current message."""
+        if not self.entries:
+            self.begin(None)
+
+        parts = self.entries[-1][2]
+        for i in range(0, len(run), 2):
+            text, tags = run[i], run[i + 1]
+            if parts and parts[-1][1] == tags:
+                parts[-1][0] += text
+            else:
+                parts.append([text, tags])
+
+        # Messages still waiting for a chunked render pick the text up from entries
+        if self.rendered == len(self.entries):
+            at_bottom = self._at_bottom()
+            self._insert(tk.END, run)
+            if at_bottom:
+                self.widget.see(tk.END)
+
+    def clear(self):
+        """Remove every message."""
+        if self._render_id is not None:
+            self.root.after_cancel(self._render_id)
+            self._render_id = None
+        self.entries = []
+        self.first = self.rendered = 0
+        self.widget.config(state=tk.NORMAL)
+        self.widget.delete(1.0, tk.END)
+        self.widget.config(state=tk.DISABLED)
+
+    def load(self, messages):
+        """Replace the display with a conversation's user and assistant messages."""
+        self.clear()
+        for message in messages:
+            sender = {"user": "You", "assistant": "FRIDAY"}.get(message.get("role"))
+            content = message.get("content")
+            if sender and isinstance(content, str) and content:
+                self.entries.append(["", sender, [[f"{content}\n\n", ()]]])
+
+        # Render only the latest window; older messages page in on scroll-up
+        self.first = self.rendered = max(0, len(self.entries) - self.window)
+        self._render_pending()
+
+    def _render_pending(self):
+        """Render the next chunk of messages that are not in the widget yet."""
+        self._render_id = None
+        end = min(len(self.entries), self.rendered + self.chunk_size)
+        args = []
+        for entry in self.entries[self.rendered:end]:
+            args.extend(self._entry_args(entry))
+        self._insert(tk.END, args)
+        self.rendered = end
+        self.widget.see(tk.END)
+
+        if self.rendered < len(self.entries):
+            self._render_id = self.root.after(1, self._render_pending)
+
+    def _on_scroll(self, first, last):
+        """Scrollbar callback: page older messages in when the view reaches the top."""
+        if self.vbar is not None:
+            self.vbar.set(first, last)
+        if float(first) <= 0.0 and self.first > 0 and not self._paging:
+            self._paging = True
+            self.root.after_idle(self._page_in)
+
+    def _page_in(self):
+        """Insert up to page_size older messages above the first shown one."""
+        self._paging = False
+        if self.first == 0:
+            return
+
+        start = max(0, self.first - self.page_size)
+        args = []
+        lines = 0
+        for entry in self.entries[start:self.first]:
+            args.extend(self._entry_args(entry))
+            lines += self._lines(entry)
+        self._insert("1.0", args)
+        self.first = start
+
+        # Keep the message that was at the top where the reader left it
+        self.widget.yview(f"{lines + 1}.0")
+
+    def _trim(self):
+        """Drop the oldest messages from the widget once more than window are shown."""
+        excess = self.rendered - self.first - self.window
+        if excess <= 0:
+            return
+        lines = sum(self._lines(entry) for entry in self.entries[self.first:self.first + excess])
+        self.widget.config(state=tk.NORMAL)
+        self.widget.delete("1.0", f"{lines + 1}.0")
+        self.widget.config(state=tk.DISABLED)
+        self.first += excess
+
+    def _insert(self, index, args):
+        """Insert alternating text, tags arguments at index."""
+        if not args:
+            return
+        self.widget.config(state=tk.NORMAL)
+        self.widget.insert(index, *args)
+        self.widget.config(state=tk.DISABLED)
+
+    def _at_bottom(self):
+        return self.widget.yview()[1] >= 1.0
+
+    @staticmethod
+    def _header(timestamp, sender):
+        """Return the insert arguments for a message's timestamp and sender label."""
+        if sender is None:
+            return []
+        if sender == "You":
+            tag = "user"
+        elif sender == "FRIDAY":
+            tag = "friday"
+        else:
+            tag = "system"
+        return [timestamp, (), f"{sender}: ", tag]
+
+    def _entry_args(self, entry):
+        timestamp, sender, parts = entry
+        args = self._header(timestamp, sender)
+        for text, tags in parts:
+            args.extend((text, tags))
+        return args
+
+    @staticmethod
+    def _lines(entry):
+        """Return how many line breaks a message contributes to the widget."""
+        return sum(text.count("\n") for text, tags in entry[2])
+
+    @staticmethod
+    def _ends_line(entry):
+        parts = entry[2]
+        return bool(parts) and parts[-1][0].endswith("\n")
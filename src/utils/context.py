@@ -0,0 +1,152 @@
+import threading
+
+try:
+    import tiktoken
+except ImportError:  # Token counts fall back to a character-based estimate
+    tiktoken = None
+
+
+class ContextWindow:
+    """Keeps the messages sent to the model within a token budget.
+
+    The system prompt and the most recent turns that fit in the budget are sent
+    verbatim. Older turns are folded into a rolling summary that is refreshed on
+    a background thread, so building a request never waits on summarization.
+    """
+
+    # Tokens each message costs on top of its content (role, separators)
+    MESSAGE_OVERHEAD = 4
+
+    def __init__(self, client=None, budget=8000, summary_model="gpt-3.5-turbo", summary_max_tokens=300,
+                 model="gpt-4-turbo"):
+        """Initialize with the OpenAI client used for summaries and a token budget for requests."""
+        self.client = client
+        self.budget = budget
+        self.summary_model = summary_model
+        self.summary_max_tokens = summary_max_tokens
+
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+
+        # Rolling summary of the turns that no longer fit, and how many turns it covers
+        self.summary = ""
+        self._summarized = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._generation = 0
+
+    def count_tokens(self, message):
+        """Return the token count of a message, caching it on the message itself."""
+        cached = message.get("_tokens")
+        if cached is not None:
+            return cached
+
+        content = message.get("content") or ""
+        if self._encoding is not None:
+            tokens = len(self._encoding.encode(content))
+        else:
+            tokens = len(content) // 4 + 1
+        tokens += self.MESSAGE_OVERHEAD
+
+        message["_tokens"] = tokens
+        return tokens
+
+    @staticmethod
+    def clean(message):
+        """Return a copy of a message without private bookkeeping keys."""
+        return {key: value for key, value in message.items() if not key.startswith("_")}
+
+    def build(self, history, extra_messages=()):
+        """Return the messages to send for history plus extra_messages, within the budget."""
+        system, turns = history[0], history[1:]
+        extra_messages = list(extra_messages)
+
+        used = self.count_tokens(system) + sum(self.count_tokens(message) for message in extra_messages)
+
+        with self._lock:
+            summary = self.summary
+            summarized = self._summarized
+        summary_message = None
+        if summary:
+            summary_message = {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+            used += self.count_tokens(summary_message)
+
+        # Walk back from the newest turn, always keeping at least the latest one
+        start = len(turns)
+        while start > 0:
+            cost = self.count_tokens(turns[start - 1])
+            if used + cost > self.budget and start < len(turns):
+                break
+            used += cost
+            start -= 1
+
+        # Turns before start no longer fit; make sure the summary catches up with them,
+        # one budget-sized batch per refresh
+        if start > summarized:
+            batch, batch_tokens = [], 0
+            for message in turns[summarized:start]:
+                batch_tokens += self.count_tokens(message)
+                if batch and batch_tokens > self.budget:
+                    break
+                batch.append(message)
+            self._schedule_refresh(batch, summarized + len(batch))
+
+        messages = [self.clean(system)]
+        if summary_message and start > 0:
+            messages.append(self.clean(summary_message))
+        messages.extend(self.clean(message) for message in turns[start:])
+        messages.extend(self.clean(message) for message in extra_messages)
+        return messages
+
+    def reset(self):
+        """Forget the rolling summary, e.g. after the history was cleared or replaced."""
+        with self._lock:
+            self.summary = ""
+            self._summarized = 0
+            self._generation += 1
+
+    def _schedule_refresh(self, folded, covered):
+        """Start a background summary refresh unless one is already running."""
+        if self.client is None:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            previous = self.summary
+            generation = self._generation
+
+        thread = threading.Thread(target=self._refresh, args=(previous, folded, covered, generation), daemon=True)
+        thread.start()
+
+    def _refresh(self, previous, folded, covered, generation):
+        """Fold newly dropped turns into the rolling summary."""
+        transcript = "\n".join(f"{message['role']}: {message.get('content') or ''}" for message in folded)
+        prompt = (
+            "Update the running summary of a conversation between a user and the assistant FRIDAY. "
+            "Keep facts, names, preferences and open requests; drop small talk. Reply with the summary only.\n\n"
+            f"Current summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"
+        )
+
+        summary = None
+        try:
+            response = self.client.chat.completions.create(
+                model=self.summary_model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=self.summary_max_tokens,
+                temperature=0.2,
+            )
+            summary = response.choices[0].message.content
+        except Exception as e:
+            print(f"Context summary error: {str(e)}")
+
+        with self._lock:
+            self._refreshing = False
+            # Discard results for a history that has since been cleared or replaced
+            if summary and generation == self._generation:
+                self.summary = summary.strip()
+                self._summarized = covered
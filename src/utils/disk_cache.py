@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+# Returned by DiskCache._decode for rows that are not valid JSON
+_CORRUPT = object()
+
+
+class DiskCache:
+    """SQLite-backed cache tier that survives restarts and is shared across processes."""
+
+    def __init__(self, path, compact_interval=300, busy_timeout=5.0):
+        """Open (or create) the cache database and start background compaction."""
+        self.path = os.path.abspath(os.path.expanduser(path))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.busy_timeout = busy_timeout
+        self.compact_interval = compact_interval
+
+        # sqlite3 connections must not be shared between threads, so each thread gets its own
+        self._local = threading.local()
+        self._connections = {}
+        self._connections_lock = threading.Lock()
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, "
+                "namespace TEXT NOT NULL, "
+                "value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)")
+
+        # Periodically drop stale rows so the file does not grow without bound
+        self._stop = threading.Event()
+        self._compactor = None
+        if compact_interval:
+            self._compactor = threading.Thread(target=self._compact_loop, daemon=True)
+            self._compactor.start()
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+            # WAL lets readers in other processes proceed while one process writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                # Close the connections of threads that have exited
+                for thread in [thread for thread in self._connections if not thread.is_alive()]:
+                    self._connections.pop(thread).close()
+                self._connections[threading.current_thread()] = conn
+        return conn
+
+    @staticmethod
+    def _decode(payload):
+        """Decode a stored value, or return _CORRUPT if the row cannot be parsed."""
+        try:
+            return json.loads(payload)
+        except ValueError:
+            return _CORRUPT
+
+    def get(self, key):
+        """Return (value, expires_at) for an unexpired key, or None."""
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Disk cache read error: {str(e)}")
+            return None
+
+        if row is None:
+            return None
+        value = self._decode(row[0])
+        if value is _CORRUPT:
+            # A corrupt row is dropped and treated as a miss
+            self.delete(key)
+            return None
+        return value, row[1]
+
+    def set(self, key, value, expires_at, namespace=''):
+        """Insert or replace an entry with an absolute expiry timestamp."""
+        try:
+            payload = json.dumps(value, default=str)
+        except (TypeError, ValueError):
+            return
+
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, namespace, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, namespace, payload, expires_at)
+                )
+        except sqlite3.Error as e:
+            print(f"Disk cache write error: {str(e)}")
+
+    def delete(self, key):
+        """Remove a key from the cache if present."""
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            print(f"Disk cache write error: {str(e)}")
+
+    def load_unexpired(self, limit=None):
+        """Return up to limit unexpired (key, value, expires_at) rows, freshest first."""
+        query = "SELECT key, value, expires_at FROM entries WHERE expires_at > ? ORDER BY expires_at DESC"
+        params = [time.time()]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        try:
+            rows = self._connection().execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"Disk cache read error: {str(e)}")
+            return []
+
+        entries = []
+        for key, payload, expires_at in rows:
+            value = self._decode(payload)
+            if value is _CORRUPT:
+                self.delete(key)
+            else:
+                entries.append((key, value, expires_at))
+        return entries
+
+    def purge_expired(self):
+        """Delete expired rows and return how many were removed."""
+        try:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Disk cache compaction error: {str(e)}")
+            return 0
+
+    def _compact_loop(self):
+        """Background loop that removes stale rows and checkpoints the WAL."""
+        while not self._stop.wait(self.compact_interval):
+            if self.purge_expired():
+                try:
+                    self._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error:
+                    # Another process holds the WAL; the next pass will retry
+                    pass
+
+    def close(self):
+        """Stop background compaction and close all connections."""
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join(timeout=1)
+        with self._connections_lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections = {}
+        self._local = threading.local()
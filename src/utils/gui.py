@@ -4,11 +4,31 @@ from tkinter import scrolledtext, simpledialog, filedialog, messagebox
 from tkinter.font import Font
 import threading
 import time
-from .assistant import FridayAssistant
+from collections import deque
+from .cancel import CancelToken, RequestCancelled
+from .chat_view import ChatView
+from .ui_queue import UIQueue
 
 class FridayGUI:
-    def __init__(self, root):
-        """Initialize the GUI for Friday Assistant."""
+    def __init__(self, root, started=None, fast_start=None, on_interactive=None, modal_errors=True):
+        """Initialize the GUI for Friday Assistant.
+        
+        The window is built first and the assistant (and the OpenAI stack it
+        imports) is loaded on a background thread; input is enabled as soon as
+        it is ready, and the assistant then warms its connections (disable with
+        FRIDAY_WARM_UP=0). started is the time.perf_counter() value the startup
+        timings are measured from. fast_start (default: FRIDAY_FAST_START)
+        skips the startup animation. on_interactive(timings) is called once
+        input is enabled, or with an "error" entry if the assistant failed to
+        load; modal_errors=False skips the error dialog in that case.
+        """
+        self.started = started if started is not None else time.perf_counter()
+        if fast_start is None:
+            fast_start = os.environ.get("FRIDAY_FAST_START", "").lower() in ("1", "true", "yes")
+        self.fast_start = fast_start
+        self.on_interactive = on_interactive
+        self.modal_errors = modal_errors
+        self.startup_timings = {}
         self.root = root
         self.root.title("F.R.I.D.A.Y.")
         self.root.geometry("700x550")
@@ -21,7 +41,8 @@ class FridayGUI:
             "text": "#f2f2f2",       # Light text
             "highlight": "#0099cc",  # Tech blue highlight
             "success": "#33cc33",    # Green for success
-            "warning": "#ffcc00"     # Yellow for warnings
+            "warning": "#ffcc00",    # Yellow for warnings
+            "danger": "#ff3333"      # Bright red for failures
         }
         
         # Configure the root window
@@ -45,23 +66,19 @@ class FridayGUI:
         self.startup_complete = False
         self.is_processing = False
         
-        # Initialize Friday assistant with all API keys
-        try:
-            self.friday = FridayAssistant(
-                api_key=api_key,
-                serpapi_key=os.environ.get("SERPAPI_KEY"),
-                weather_key=os.environ.get("OPENWEATHERMAP_KEY"),
-                news_key=os.environ.get("NEWSAPI_KEY"),
-                stock_key=os.environ.get("ALPHAVANTAGE_KEY")
-            )
-            self.api_key_valid = True
-        except Exception as e:
-            self.friday = None
-            self.api_key_valid = False
-            messagebox.showerror("System Error", f"Error initializing F.R.I.D.A.Y.: {str(e)}")
+        # Messages sent while a request is running wait here; the running one can be cancelled
+        self.pending = deque()
+        self.cancel_token = None
+        self.clear_requested = False
+        self.friday = None
+        self.api_key_valid = False
         
         # Create and configure GUI elements
         self.create_widgets()
+        self._mark_startup("window")
+        
+        # Initialize Friday assistant with all API keys, off the main loop
+        threading.Thread(target=self._load_assistant, args=(api_key,), daemon=True).start()
         
         # Startup sequence
         self.run_startup_sequence()
@@ -161,6 +178,13 @@ class FridayGUI:
         self.chat_display.tag_configure("system", foreground=self.colors["warning"])
         self.chat_display.tag_configure("alert", foreground=self.colors["warning"], font=self.fonts["subtitle"])
         
+        # Only a window of recent messages is kept in the widget
+        self.chat_view = ChatView(self.root, self.chat_display)
+        
+        # Worker threads update widgets only through this queue, drained on the main loop
+        self.ui = UIQueue(self.root, self.chat_view.write)
+        self.ui.start()
+        
         # Input area with tech-inspired border
         input_frame = tk.LabelFrame(main_frame, text="Command Input", 
                                   font=self.fonts["subtitle"],
@@ -178,6 +202,7 @@ class FridayGUI:
                                  relief=tk.SUNKEN, bd=2)
         self.user_input.pack(fill=tk.X, padx=10, pady=(10, 5), ipady=3)
         self.user_input.bind("<Return>", self.process_input)
+        self.user_input.bind("<Escape>", self.cancel_request)
         
         # Button frame
         button_frame = tk.Frame(input_frame, bg=self.colors["bg"])
@@ -204,17 +229,58 @@ class FridayGUI:
                                  bd=1, width=10, command=self.save_conversation)
         self.save_button.pack(side=tk.LEFT, padx=5)
         
+        # Cancel button - aborts the request in progress
+        self.cancel_button = tk.Button(button_frame, text="CANCEL", font=self.fonts["subtitle"],
+                                    bg="white", fg=self.colors["accent"],
+                                    activebackground="white", activeforeground=self.colors["accent"],
+                                    bd=1, width=10, command=self.cancel_request)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        
+        # Queued requests indicator
+        self.queue_var = tk.StringVar(value="")
+        self.queue_label = tk.Label(button_frame, textvariable=self.queue_var,
+                                  font=self.fonts["status"],
+                                  bg=self.colors["bg"], fg=self.colors["warning"])
+        self.queue_label.pack(side=tk.LEFT, padx=5)
+        
         # Set input field as disabled until startup completes
         self.user_input.config(state=tk.DISABLED)
         self.send_button.config(state=tk.DISABLED)
         self.clear_button.config(state=tk.DISABLED)
         self.save_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.DISABLED)
         
         # Check internet connectivity
         self.check_internet_status()
 
+    def _load_assistant(self, api_key):
+        """Create the assistant on a background thread and hand it to the main loop."""
+        try:
+            # Imported here so the window appears before the OpenAI stack loads
+            from .assistant import FridayAssistant
+            
+            friday = FridayAssistant(
+                api_key=api_key,
+                serpapi_key=os.environ.get("SERPAPI_KEY"),
+                weather_key=os.environ.get("OPENWEATHERMAP_KEY"),
+                news_key=os.environ.get("NEWSAPI_KEY"),
+                stock_key=os.environ.get("ALPHAVANTAGE_KEY"),
+                journal_path=os.environ.get("FRIDAY_JOURNAL_PATH")
+            )
+            error = None
+        except Exception as e:
+            friday = None
+            error = e
+        self.ui.call(self._finish_startup, friday, error)
+        
+        # Open connections and prefill the cache while the first question is typed
+        if friday is not None and os.environ.get("FRIDAY_WARM_UP", "1").lower() not in ("0", "false", "no"):
+            for step, result in friday.warm_up().items():
+                if result != "ok":
+                    print(f"Warm-up {step}: {result}")
+    
     def run_startup_sequence(self):
-        """Run a startup sequence animation."""
+        """Run a startup sequence animation until the assistant is ready."""
         self.startup_steps = [
             "Initializing systems...",
             "Establishing secure connection...",
@@ -224,22 +290,46 @@ class FridayGUI:
             "All systems nominal."
         ]
         
-        # Start the sequence in a separate thread
-        threading.Thread(target=self._animate_startup).start()
+        self.status_var.set(self.startup_steps[0])
+        if not self.fast_start:
+            self.root.after(800, self._animate_startup, 1)
     
-    def _animate_startup(self):
-        """Animate the startup sequence."""
-        for i, step in enumerate(self.startup_steps):
-            self.status_var.set(step)
-            
-            # Show system message in chat display
-            if i > 0:  # Skip showing the first message
-                self.display_message("System", step)
-            
-            # Delay between steps
-            time.sleep(0.8)
+    def _animate_startup(self, i):
+        """Show the next startup step; the last one is shown once the assistant is ready."""
+        if self.startup_complete or i >= len(self.startup_steps) - 1:
+            return
+        
+        step = self.startup_steps[i]
+        self.status_var.set(step)
+        self.display_message("System", step)
+        
+        # Delay between steps
+        self.root.after(800, self._animate_startup, i + 1)
+    
+    def _finish_startup(self, friday, error):
+        """Enable input as soon as the assistant is ready. Runs on the main loop."""
+        self._mark_startup("assistant")
+        self.startup_complete = True
+        
+        if error is not None:
+            self.status_var.set("Offline")
+            if self.modal_errors:
+                messagebox.showerror("System Error", f"Error initializing F.R.I.D.A.Y.: {str(error)}")
+            self._mark_startup("interactive")
+            if self.on_interactive is not None:
+                self.on_interactive(dict(self.startup_timings, error=str(error)))
+            return
+        
+        self.friday = friday
+        self.api_key_valid = True
+        
+        # Show turns restored from the journal, rendered in chunks like a loaded conversation
+        if len(self.friday.conversation_history) > 1:
+            self.ui.call(self.chat_view.load, list(self.friday.conversation_history))
+        
+        if not self.fast_start:
+            self.display_message("System", self.startup_steps[-1])
         
-        # Enable input after startup
         self.user_input.config(state=tk.NORMAL)
         self.send_button.config(state=tk.NORMAL)
         self.clear_button.config(state=tk.NORMAL)
@@ -249,20 +339,25 @@ class FridayGUI:
         self.user_input.focus_set()
         
         # Display welcome message
-        if self.friday and self.api_key_valid:
-            greeting = self.friday.get_greeting()
-            # Add internet capability information to the greeting
-            greeting += " I now have internet access capabilities. I can search the web, check weather, news, and stocks in real-time."
-            self.display_message("FRIDAY", greeting)
-        
-        self.startup_complete = True
+        greeting = self.friday.get_greeting()
+        # Add internet capability information to the greeting
+        greeting += " I now have internet access capabilities. I can search the web, check weather, news, and stocks in real-time."
+        self.display_message("FRIDAY", greeting)
         
         # Set final status
         self.status_var.set("Ready")
+        
+        self._mark_startup("interactive")
+        if self.on_interactive is not None:
+            self.on_interactive(dict(self.startup_timings))
+    
+    def _mark_startup(self, phase):
+        """Record the milliseconds from process start to the end of a startup phase."""
+        self.startup_timings[phase] = round((time.perf_counter() - self.started) * 1000, 1)
     
     def process_input(self, event=None):
-        """Process user input and get response from Friday."""
-        if self.is_processing or not self.startup_complete:
+        """Queue user input and start it if no other request is running."""
+        if not self.startup_complete:
             return
         
         user_message = self.user_input.get().strip()
@@ -273,81 +368,127 @@ class FridayGUI:
         # Clear input field
         self.user_input.delete(0, tk.END)
         
+        self.pending.append(user_message)
+        if self.is_processing:
+            self._show_queue()
+        else:
+            self._start_next_request()
+    
+    def _start_next_request(self):
+        """Start the oldest queued request, if any. Runs on the main loop."""
+        if not self.pending:
+            return
+        user_message = self.pending.popleft()
+        self._show_queue()
+        
         # Display user message
         self.display_message("You", user_message)
         
         # Set processing state
         self.is_processing = True
+        self.cancel_token = CancelToken()
         self.status_var.set("Processing request...")
-        self.send_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
         
         # Display acknowledgement
         self.display_message("FRIDAY", self.friday.get_acknowledgement())
         
         # Create a thread for getting the response
-        thread = threading.Thread(target=self.get_response_thread, args=(user_message,))
+        thread = threading.Thread(target=self.get_response_thread, args=(user_message, self.cancel_token))
         thread.daemon = True
         thread.start()
     
-    def get_response_thread(self, user_message):
+    def _show_queue(self):
+        """Show how many requests are waiting and the next one. Runs on the main loop."""
+        if not self.pending:
+            self.queue_var.set("")
+            return
+        preview = self.pending[0] if len(self.pending[0]) <= 30 else self.pending[0][:27] + "..."
+        self.queue_var.set(f"Queued: {len(self.pending)} (next: {preview})")
+    
+    def cancel_request(self, event=None):
+        """Abort the request in progress; queued requests still run."""
+        if self.cancel_token is not None:
+            self.status_var.set("Cancelling...")
+            self.cancel_token.cancel()
+    
+    def get_response_thread(self, user_message, cancel=None):
         """Thread function to get response from Friday."""
         try:
             # Analyze sentiment to determine if user is stressed
             sentiment = self.friday.analyze_sentiment(user_message)
             
-            # Get response
-            response = self.friday.ask(user_message)
+            # Add a special alert visual if the user seems stressed
+            tag = "alert" if sentiment == "concerned" else None
+            
+            # Render the response incrementally as chunks stream in
+            streamed = []
+            
+            def on_delta(delta):
+                if not streamed:
+                    self.start_message("FRIDAY")
+                streamed.append(delta)
+                self.append_message(delta, tag)
             
-            # Display the response
-            if sentiment == "concerned":
-                # Add a special alert sound effect or visual
-                self.display_message("FRIDAY", response, tag="alert")
+            response = self.friday.ask(user_message, on_delta=on_delta, cancel=cancel)
+            
+            # Close off the streamed message, or show the reply if nothing was streamed
+            if streamed:
+                self.append_message("\n\n", tag)
             else:
-                self.display_message("FRIDAY", response)
+                self.display_message("FRIDAY", response, tag=tag)
                 
+        except RequestCancelled:
+            # Nothing from a cancelled request is kept in the conversation history
+            self.display_message("System", "Request cancelled.")
         except Exception as e:
             self.display_message("System", f"System error: {str(e)}")
         
-        # Reset processing state
+        self.ui.call(self._finish_response)
+    
+    def _finish_response(self):
+        """Reset the processing state and start the next queued request. Runs on the main loop."""
         self.is_processing = False
+        self.cancel_token = None
+        self.cancel_button.config(state=tk.DISABLED)
         self.status_var.set("Ready")
-        self.send_button.config(state=tk.NORMAL)
         self.user_input.focus_set()
+        if self.clear_requested:
+            self.clear_requested = False
+            self._clear_conversation()
+        self._start_next_request()
     
     def display_message(self, sender, message, tag=None):
-        """Display a message in the chat display."""
-        self.chat_display.config(state=tk.NORMAL)
-        
-        # Insert timestamp
+        """Display a message in the chat display. Safe to call from any thread."""
+        self.start_message(sender)
+        self.append_message(f"{message}\n\n", tag)
+    
+    def start_message(self, sender):
+        """Insert the timestamp and sender label that begin a message."""
         timestamp = f"[{time.strftime('%H:%M:%S')}] "
-        self.chat_display.insert(tk.END, timestamp)
-        
-        # Insert sender with appropriate tag
-        if sender == "You":
-            self.chat_display.insert(tk.END, f"{sender}: ", "user")
-        elif sender == "FRIDAY":
-            self.chat_display.insert(tk.END, f"{sender}: ", "friday")
-        else:
-            self.chat_display.insert(tk.END, f"{sender}: ", "system")
-        
-        # Insert message with tag if provided
-        if tag:
-            self.chat_display.insert(tk.END, f"{message}\n\n", tag)
-        else:
-            self.chat_display.insert(tk.END, f"{message}\n\n")
-        
-        # Scroll to the bottom
-        self.chat_display.see(tk.END)
-        
-        # Disable text widget
-        self.chat_display.config(state=tk.DISABLED)
+        self.ui.call(self.chat_view.begin, sender, timestamp)
+    
+    def append_message(self, text, tag=None):
+        """Append text to the message currently being displayed."""
+        # Queued inserts are merged and scrolled into view once per frame
+        self.ui.insert(text, tag)
     
     def clear_chat(self):
         """Clear the chat display and conversation history."""
-        # Clear display
-        self.chat_display.config(state=tk.NORMAL)
-        self.chat_display.delete(1.0, tk.END)
-        self.chat_display.config(state=tk.DISABLED)
+        # Drop queued requests and abort the running one
+        self.pending.clear()
+        self._show_queue()
+        if self.is_processing:
+            # The request may already be recording its turn; clear once it has finished
+            self.clear_requested = True
+            self.cancel_request()
+            return
+        self._clear_conversation()
+    
+    def _clear_conversation(self):
+        """Clear the display and Friday's history. Runs on the main loop with no request running."""
+        # Clear display, after any updates already queued
+        self.ui.call(self.chat_view.clear)
         
         # Clear Friday's conversation history
         if self.friday:
@@ -359,29 +500,32 @@ class FridayGUI:
     
     def check_internet_status(self):
         """Check internet connectivity and update status indicator."""
-        import threading
-        import requests
-        
         def check_connection():
+            # Imported on the worker thread to keep it off the startup path
+            import requests
+            
             try:
                 # Try to reach a reliable site
                 response = requests.get("https://www.google.com", timeout=5)
                 if response.status_code == 200:
-                    self.internet_status_var.set("◉ ONLINE")
-                    self.internet_status.config(fg=self.colors["success"])
+                    status = ("◉ ONLINE", "success")
                 else:
-                    self.internet_status_var.set("◉ LIMITED")
-                    self.internet_status.config(fg=self.colors["warning"])
+                    status = ("◉ LIMITED", "warning")
             except:
-                self.internet_status_var.set("◉ OFFLINE")
-                self.internet_status.config(fg=self.colors["danger"])
+                status = ("◉ OFFLINE", "danger")
             
-            # Schedule periodic checks if window is still active
-            if self.root.winfo_exists():
-                self.root.after(60000, lambda: threading.Thread(target=check_connection).start())  # Check every minute
+            self.ui.call(self._show_internet_status, *status)
         
         # Start the check in a separate thread
-        threading.Thread(target=check_connection).start()
+        threading.Thread(target=check_connection, daemon=True).start()
+    
+    def _show_internet_status(self, text, color):
+        """Update the internet status indicator. Runs on the main loop."""
+        self.internet_status_var.set(text)
+        self.internet_status.config(fg=self.colors[color])
+        
+        # Schedule periodic checks while the window is open
+        self.root.after(60000, self.check_internet_status)  # Check every minute
     
     def save_conversation(self):
         """Save the current conversation."""
@@ -408,10 +552,8 @@ class FridayGUI:
             
         try:
             if self.friday.load_conversation(filename):
-                # Clear chat display
-                self.chat_display.config(state=tk.NORMAL)
-                self.chat_display.delete(1.0, tk.END)
-                self.chat_display.config(state=tk.DISABLED)
+                # Replace the chat display with the loaded conversation, rendered in chunks
+                self.ui.call(self.chat_view.load, list(self.friday.conversation_history))
                 
                 # Display loaded conversation
                 self.display_message("System", f"Loaded conversation from {filename}")
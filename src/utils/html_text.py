@@ -0,0 +1,67 @@
+from html.parser import HTMLParser
+
+
+# Content types that are worth parsing for visible text
+HTML_CONTENT_TYPES = frozenset(['text/html', 'application/xhtml+xml'])
+
+
+def normalize_text(text):
+    """Collapse extracted page text into one phrase per line without blank lines."""
+    # Break into lines and remove leading and trailing space on each
+    lines = (line.strip() for line in text.splitlines())
+
+    # Break multi-headlines into a line each
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+
+    # Join the lines
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+
+def truncate_text(text, max_length):
+    """Truncate text to max_length characters, marking the cut with an ellipsis."""
+    if len(text) > max_length:
+        return text[:max_length] + "..."
+    return text
+
+
+class VisibleTextParser(HTMLParser):
+    """Incremental HTML parser that collects visible text and stops once it has enough.
+
+    Feed it decoded chunks as they arrive; once done is set the caller can stop
+    downloading. Text inside script, style and similar tags is skipped.
+    """
+
+    SKIP_TAGS = frozenset(['script', 'style', 'noscript', 'template', 'svg'])
+
+    def __init__(self, max_length=None):
+        super().__init__(convert_charrefs=True)
+        self.max_length = max_length
+        self.done = False
+        self._parts = []
+        self._length = 0
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth or self.done:
+            return
+
+        self._parts.append(data)
+
+        # Track roughly how much text will survive normalization
+        words = data.split()
+        if words:
+            self._length += sum(len(word) for word in words) + len(words)
+        if self.max_length is not None and self._length > self.max_length:
+            self.done = True
+
+    def text(self):
+        """Return the normalized visible text collected so far."""
+        return normalize_text(''.join(self._parts))
@@ -0,0 +1,143 @@
+import re
+from collections import namedtuple
+
+
+# A detected intent: its type, extracted entities, priority (lower wins) and
+# the span of the message it was found in
+Intent = namedtuple('Intent', ['type', 'entities', 'priority', 'start', 'end'])
+
+
+class IntentRouter:
+    """Detects internet-lookup intents in a message in a single pass over precompiled patterns."""
+
+    # Intent types in priority order, each with the patterns that detect it.
+    # Patterns run against the lowercased message and must start with a literal
+    # keyword or a (?:a|b) group of keywords; the optional "entity" group holds
+    # the intent's main entity.
+    INTENT_PATTERNS = [
+        ('weather', [
+            r"weather\s+in\s+(?P<entity>[a-z\s]+)",
+            r"weather\s+(?:for|at)\s+(?P<entity>[a-z\s]+)",
+            r"what's\s+the\s+weather\s+(?:in|at|for)\s+(?P<entity>[a-z\s]+)",
+            r"how's\s+the\s+weather\s+(?:in|at|for)\s+(?P<entity>[a-z\s]+)",
+        ]),
+        ('news', [
+            r"news\s+(?:about|on)\s+(?P<entity>[a-z\s]+)",
+            r"(?:latest|recent|current)\s+news",
+            r"what's\s+(?:happening|going\s+on)",
+            r"current\s+events",
+        ]),
+        ('portfolio', [
+            r"(?:stock|stocks)\s+(?:prices?|values?|info)?\s*(?:for|of)\s+(?P<entity>[a-z]{1,5}(?:\s*(?:,|and|&)\s*[a-z]{1,5}\b)+)",
+        ]),
+        ('stock', [
+            r"stock\s+(?:(?:price|value|info)\s+)?(?:for|of)\s+(?P<entity>[a-z]+)",
+            r"how\s+is\s+(?P<entity>[a-z]+)\s+stock",
+            r"what's\s+(?P<entity>[a-z]+)\s+stock\s+(?:price|doing)",
+        ]),
+        ('search', [
+            r"search\s+(?:for|about)\s+(?P<entity>[a-z0-9\s]+)",
+            r"find\s+(?:info|information)\s+(?:about|on)\s+(?P<entity>[a-z0-9\s]+)",
+            r"who\s+is\s+(?P<entity>[a-z\s]+)",
+            r"what\s+is\s+(?P<entity>[a-z0-9\s]+)",
+            r"tell\s+me\s+about\s+(?P<entity>[a-z0-9\s]+)",
+            r"how\s+(?:to|do|does|can)\s+(?P<entity>[a-z0-9\s]+)",
+        ]),
+    ]
+
+    # Filler words the portfolio pattern can capture that are never tickers,
+    # e.g. "stock for tesla and more"
+    SYMBOL_STOP_WORDS = frozenset([
+        'a', 'all', 'an', 'any', 'also', 'else', 'etc', 'it', 'me', 'mine', 'more', 'my', 'now',
+        'other', 'others', 'our', 'rest', 'so', 'some', 'the', 'them', 'then', 'these', 'those',
+        'today', 'too', 'us', 'you', 'your',
+    ])
+
+    # Words that end an entity, e.g. "weather in boston and the news" or
+    # "search for python and latest news"
+    CLAUSE_BREAK = re.compile(r'\s+(?:and|but|or|then|also|please|today|tomorrow|now|right now|currently)\b.*$')
+
+    def __init__(self):
+        """Compile every intent pattern once and index them by their leading keyword."""
+        # keyword -> [(compiled pattern, intent type, priority)] in priority order
+        self._by_keyword = {}
+        for priority, (intent_type, patterns) in enumerate(self.INTENT_PATTERNS):
+            for pattern in patterns:
+                compiled = re.compile(pattern)
+                for keyword in self._leading_keywords(pattern):
+                    self._by_keyword.setdefault(keyword, []).append((compiled, intent_type, priority))
+
+        # One scan over the message finds every position where some intent could start
+        keywords = sorted(self._by_keyword, key=len, reverse=True)
+        self._trigger = re.compile(r"\b(" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b")
+
+    @staticmethod
+    def _leading_keywords(pattern):
+        """Return the literal word(s) a pattern must start with."""
+        group = re.match(r"\(\?:([a-z'|]+)\)", pattern)
+        if group:
+            return group.group(1).split('|')
+        return [re.match(r"[a-z']+", pattern).group(0)]
+
+    def route(self, message):
+        """Return every intent found in message, best first.
+        
+        An intent whose span overlaps a higher-priority (or, for the same type, an
+        earlier) one is dropped, e.g. the search hidden in "what is the weather in
+        boston"; non-overlapping intents of the same type are all kept.
+        """
+        text = message.lower()
+        found = []
+        for trigger in self._trigger.finditer(text):
+            # Try only the patterns that start with this keyword; the first match wins here
+            for compiled, intent_type, priority in self._by_keyword[trigger.group(1)]:
+                match = compiled.match(text, trigger.start())
+                intent = self._intent(intent_type, priority, match) if match else None
+                if intent is not None:
+                    found.append(intent)
+                    break
+
+        intents = []
+        for intent in sorted(found, key=lambda intent: (intent.priority, intent.start)):
+            if all(intent.end <= other.start or intent.start >= other.end for other in intents):
+                intents.append(intent)
+        return intents
+
+    def _intent(self, intent_type, priority, match):
+        """Build an Intent from a pattern match, trimming the entity and its span.
+
+        Returns None if nothing usable is left of the entity.
+        """
+        if 'entity' not in match.re.groupindex:
+            return Intent(intent_type, self._entities(intent_type, None), priority, match.start(), match.end())
+
+        raw = match.group('entity')
+        entity = raw.strip()
+        # Portfolio entities are lists joined by "and", so they are split rather than trimmed
+        if intent_type != 'portfolio':
+            entity = self.CLAUSE_BREAK.sub('', entity)
+        end = match.start('entity') + len(raw) - len(raw.lstrip()) + len(entity)
+        entities = self._entities(intent_type, entity)
+        if intent_type == 'portfolio' and not entities['symbols']:
+            return None
+        return Intent(intent_type, entities, priority, match.start(), end)
+
+    def best(self, message):
+        """Return the highest-priority intent in message, or None."""
+        intents = self.route(message)
+        return intents[0] if intents else None
+
+    @classmethod
+    def _entities(cls, intent_type, entity):
+        """Turn the captured entity text into structured entities for an intent type."""
+        if intent_type == 'weather':
+            return {'location': entity}
+        if intent_type == 'news':
+            return {'topic': entity or 'general'}
+        if intent_type == 'portfolio':
+            symbols = re.split(r'\s*(?:,|\band\b|&)\s*', entity)
+            return {'symbols': [symbol.upper() for symbol in symbols
+                                if symbol and symbol not in cls.SYMBOL_STOP_WORDS]}
+        if intent_type == 'stock':
+            return {'symbol': entity.upper()}
+        return {'query': entity}
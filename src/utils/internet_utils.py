@@ -1,38 +1,545 @@
-import requests
+import aiohttp
+import asyncio
+import codecs
+import concurrent.futures
 import json
 import os
+import threading
 from datetime import datetime
-from bs4 import BeautifulSoup
 import re
 import time
+from urllib.parse import urlsplit
+from .cache import TTLCache
+from .disk_cache import DiskCache
+from .rate_limit import TokenBucket, RateLimitError
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .html_text import HTML_CONTENT_TYPES, VisibleTextParser, normalize_text, truncate_text
+from .tracing import get_tracer, current_span, bind
+from .cancel import RequestCancelled
+
+
+class HTTPResponse:
+    """Fully read HTTP response returned by InternetUtils._get."""
+    
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+    
+    def json(self):
+        """Decode the response body as JSON."""
+        return json.loads(self.text)
+
+
+class _Flight:
+    """A shared in-flight fetch and the number of callers waiting on it."""
+    
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
 
 class InternetUtils:
     """Utility class for internet access capabilities."""
     
-    def __init__(self, api_key=None):
-        """Initialize internet utilities with optional API keys."""
+    # Statuses worth retrying with backoff (throttling and transient server errors)
+    RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+    
+    # Statuses that mean the lookup itself is bad (unknown city, missing page),
+    # cached for longer than transient errors
+    NOT_FOUND_STATUSES = frozenset([400, 404, 410])
+    
+    # Per-provider token buckets as (requests per second, burst). Stock quotes are
+    # configured from ALPHAVANTAGE_CALLS_PER_MINUTE. Webpage fetches hit arbitrary
+    # hosts, so they are neither rate limited nor guarded by a breaker.
+    PROVIDER_RATE_LIMITS = {
+        'serpapi': (1.0, 5),
+        'duckduckgo': (0.5, 3),
+        'weather': (1.0, 10),
+        'news': (0.5, 5),
+    }
+    
+    # Title of the single result search_web returns when the search itself failed
+    SEARCH_ERROR_TITLE = 'Search Error'
+    
+    # Providers that get their own pooled session, mapped to (host pools,
+    # connections per host). Single-host APIs only need one host pool; webpage
+    # fetches fan out to many hosts so they keep more host pools around.
+    PROVIDER_POOLS = {
+        'serpapi': (1, 4),
+        'duckduckgo': (1, 4),
+        'webpage': (16, 4),
+        'weather': (1, 4),
+        'news': (1, 4),
+        'stock': (1, 4),
+    }
+    
+    # Provider API endpoints; override through the endpoints argument, e.g. to
+    # point at local stand-in servers
+    ENDPOINTS = {
+        'serpapi': 'https://serpapi.com/search',
+        'duckduckgo': 'https://lite.duckduckgo.com/lite/',
+        'weather': 'https://api.openweathermap.org/data/2.5/weather',
+        'news': 'https://newsapi.org/v2/top-headlines',
+        'stock': 'https://www.alphavantage.co/query',
+    }
+    
+    def __init__(self, api_key=None, connect_timeout=3.05, read_timeout=10,
+                 max_retries=2, backoff_factor=0.5, max_connections=32, max_connections_per_host=4,
+                 cache_ttls=None, cache_max_entries=512, cache_max_bytes=8 * 1024 * 1024,
+                 cache_path=None, warm_start=None, stream_pages=True, max_page_bytes=512 * 1024,
+                 rate_limit_wait=2.0, breaker_threshold=3, breaker_reset_timeout=30.0,
+                 max_stale=900, error_ttl=30, not_found_ttl=300, endpoints=None, rate_limits=None,
+                 pool_sizes=None, stock_queue_wait=120.0):
+        """Initialize internet utilities with optional API keys and HTTP settings."""
         # For Google Search API (if provided)
         self.serpapi_key = api_key or os.environ.get("SERPAPI_KEY")
         
+        self.endpoints = dict(self.ENDPOINTS, **(endpoints or {}))
+        
         # Default headers for requests
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
-        # Cache to avoid repeating the same requests
-        self.cache = {}
-        self.cache_expiry = 600  # Cache expiry in seconds (10 minutes)
+        # (connect, read) timeout applied to every outgoing request
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        
+        # One keep-alive connector per provider, sized by PROVIDER_POOLS (updated with
+        # pool_sizes) and capped by max_connections in total and max_connections_per_host
+        # per host, so a burst of page fetches never starves the API providers
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.pool_sizes = dict(self.PROVIDER_POOLS, **(pool_sizes or {}))
+        
+        # Webpages are streamed through an incremental parser that stops once it has
+        # enough text, and never reads more than max_page_bytes of the body
+        self.stream_pages = stream_pages
+        self.max_page_bytes = max_page_bytes
+        
+        # All lookups run on one background event loop that owns the HTTP sessions.
+        # Both are created lazily on first use.
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+        self._http = {}
+        
+        # Per-provider rate limiters. Requests that would wait longer than
+        # rate_limit_wait seconds for a slot, or for a retry after a 429 or 5xx,
+        # fail fast instead of stalling.
+        # rate_limits overrides the (rate, burst) of individual providers, and a
+        # rate of 0 or less turns a provider's limiter off.
+        self.rate_limit_wait = rate_limit_wait
+        
+        # Alpha Vantage enforces a per-minute quota (5 on the free tier), so stock
+        # lookups queue on a token bucket instead of tripping the limit. A lookup
+        # that would queue longer than stock_queue_wait seconds fails instead.
+        self.stock_queue_wait = stock_queue_wait
+        
+        # Warm-up prefetches quotes for at most this many watchlist symbols
+        self.warm_up_symbols = 2
+        stock_calls_per_minute = float(os.environ.get("ALPHAVANTAGE_CALLS_PER_MINUTE", 5))
+        limits = dict(self.PROVIDER_RATE_LIMITS, stock=(stock_calls_per_minute / 60.0, stock_calls_per_minute))
+        limits.update(rate_limits or {})
+        self.rate_limiters = {
+            provider: TokenBucket(rate, capacity=burst, name=provider)
+            for provider, (rate, burst) in limits.items() if rate > 0
+        }
+        
+        # Circuit breakers trip after consecutive failures so a failing provider
+        # costs nothing until it is probed again
+        self.breakers = {
+            provider: CircuitBreaker(provider, breaker_threshold, breaker_reset_timeout)
+            for provider in limits
+        }
+        
+        # In-flight fetches keyed by cache key, used to coalesce identical lookups
+        self._inflight = {}
+        self.coalesced = 0
+        
+        # Spans for cache lookups, provider calls and page extraction
+        self.tracer = get_tracer()
+        
+        # Optional persistent tier shared across restarts and processes
+        cache_path = cache_path or os.environ.get("FRIDAY_CACHE_PATH")
+        self.disk_cache = DiskCache(cache_path) if cache_path else None
+        
+        # Cache to avoid repeating the same requests, bounded and shared across threads.
+        # Expiry is per namespace (TTLCache.DEFAULT_TTLS, overridden by cache_ttls).
+        self.cache = TTLCache(
+            ttls=cache_ttls,
+            max_entries=cache_max_entries,
+            max_bytes=cache_max_bytes,
+            backing=self.disk_cache,
+            max_stale=max_stale
+        )
+        
+        # Failed lookups are cached briefly so retries of a bad key don't hit the network
+        self.error_ttl = error_ttl
+        self.not_found_ttl = not_found_ttl
+        
+        # Background refreshes of stale entries, kept referenced until they finish
+        self._revalidations = set()
+        
+        # Warm start preloads the freshest persisted entries into memory
+        if warm_start is None:
+            warm_start = os.environ.get("FRIDAY_CACHE_WARM_START", "").lower() in ("1", "true", "yes")
+        if warm_start:
+            self.cache.warm_start()
+    
+    @property
+    def loop(self):
+        """Return the event loop that runs all lookups, starting it on first use."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever,
+                                                     name="internet-utils-loop", daemon=True)
+                self._loop_thread.start()
+            return self._loop
+    
+    def submit(self, coro):
+        """Schedule a coroutine on the lookup loop and return a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(self._in_trace(coro), self.loop)
+    
+    @staticmethod
+    def _in_trace(coro):
+        """Carry the caller's active trace span over to the lookup loop thread."""
+        span = current_span()
+        return bind(coro, span) if span is not None else coro
+    
+    def run(self, coro, timeout=None, cancel=None):
+        """Run a coroutine on the lookup loop and block until it returns.
+        
+        If the CancelToken cancel is cancelled first, the coroutine's task is
+        cancelled (aborting its HTTP requests) and RequestCancelled is raised.
+        """
+        loop = self.loop
+        if threading.current_thread() is self._loop_thread:
+            coro.close()
+            raise RuntimeError("InternetUtils.run cannot be called from its own event loop; await the async API instead")
+        future = asyncio.run_coroutine_threadsafe(self._in_trace(coro), loop)
+        if cancel is None:
+            return future.result(timeout)
+        
+        remove = cancel.on_cancel(future.cancel)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.CancelledError:
+            raise RequestCancelled() from None
+        finally:
+            remove()
+    
+    async def _session(self, provider):
+        """Return the provider's HTTP session, creating it on the lookup loop if needed."""
+        session = self._http.get(provider)
+        if session is None or session.closed:
+            host_pools, per_host = self.pool_sizes.get(provider, (1, self.max_connections_per_host))
+            connector = aiohttp.TCPConnector(
+                limit=min(host_pools * per_host, self.max_connections),
+                limit_per_host=min(per_host, self.max_connections_per_host),
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            connect_timeout, read_timeout = self.timeout
+            session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+            )
+            self._http[provider] = session
+        return session
+    
+    async def _cached(self, key, factory):
+        """Return the cached value for key, fetching it with factory() on a miss.
+        
+        Stale entries (expired but within max_stale) are returned immediately while a
+        background refresh replaces them, so hot keys never wait on the network.
+        """
+        with self.tracer.span(f"fetch.{TTLCache.namespace_of(key)}") as span:
+            found = self.cache.lookup(key, backing=False)
+            if found is None and self.cache.backing is not None:
+                # Falling through to the SQLite tier can block on its busy timeout
+                found = await asyncio.to_thread(self.cache.lookup, key)
+            elif found is None:
+                found = self.cache.lookup(key)
+            if found is None:
+                # Concurrent callers for the same key share a single fetch
+                span.set(cache="coalesced" if key in self._inflight else "miss")
+                return await self._coalesce(key, factory)
+            
+            value, fresh = found
+            span.set(cache="hit" if fresh else "stale")
+            if not fresh and key not in self._inflight:
+                # The refresh outlives this request, so keep it out of the caller's trace
+                task = asyncio.ensure_future(bind(self._coalesce(key, factory), None))
+                self._revalidations.add(task)
+                task.add_done_callback(self._revalidations.discard)
+            return value
+    
+    def _negative(self, key, result, not_found=False, error=None):
+        """Cache a failed lookup result for a short time and return it.
+        
+        Breaker and rate limit rejections are local decisions and are not cached, and
+        a failed refresh never replaces a stale value that can still be served; the
+        stale value is re-stamped instead so the refresh is not retried for error_ttl.
+        """
+        if isinstance(error, (CircuitOpenError, RateLimitError)):
+            return result
+        if self.cache.peek(key) is not None:
+            self.cache.extend(key, self.error_ttl)
+        else:
+            ttl = self.not_found_ttl if not_found else self.error_ttl
+            self.cache.set(key, result, ttl=ttl, max_stale=0, persist=False)
+        return result
+    
+    async def _store(self, key, value):
+        """Cache a fetched value, writing the persistent tier off the event loop."""
+        if self.cache.backing is None:
+            self.cache.set(key, value)
+        else:
+            await asyncio.to_thread(self.cache.set, key, value)
+    
+    async def _coalesce(self, key, factory):
+        """Await the in-flight fetch for key, starting one with factory() if none is running.
+        
+        Every waiter gets the same result (or exception). The shared fetch is only
+        cancelled once all of its waiters have been cancelled.
+        """
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._inflight[key] = flight
+            
+            def finished(task):
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            
+            flight.task.add_done_callback(finished)
+        else:
+            self.coalesced += 1
+        
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+    
+    def _backoff(self, attempt, retry_after=None):
+        """Return how long to sleep before the given retry attempt."""
+        if retry_after:
+            try:
+                return min(float(retry_after), 30.0)
+            except ValueError:
+                pass
+        return self.backoff_factor * (2 ** attempt)
+    
+    async def _get(self, provider, url, params=None, headers=None, reader=None, max_wait=None):
+        """Issue a GET through the provider's breaker and rate limiter, with timeouts and bounded retries.
+        
+        By default the whole body is read into an HTTPResponse. If reader is given,
+        it is awaited with the open aiohttp response instead and its result returned.
+        Raises CircuitOpenError while the provider's circuit is open and RateLimitError
+        if a rate limit slot is more than max_wait (default rate_limit_wait) seconds away.
+        """
+        with self.tracer.span(f"http.{provider}") as span:
+            response = await self._get_guarded(provider, span, url, params, headers, reader, max_wait)
+            span.set(status=response.status_code)
+            return response
+    
+    async def _get_guarded(self, provider, span, url, params, headers, reader, max_wait):
+        """Body of _get: breaker check, rate limit wait and the request itself."""
+        breaker = self.breakers.get(provider)
+        limiter = self.rate_limiters.get(provider)
+        if breaker is not None:
+            breaker.check()
+        
+        try:
+            if limiter is not None:
+                queued = time.perf_counter()
+                await limiter.acquire(max_wait=self.rate_limit_wait if max_wait is None else max_wait)
+                span.set(queued_ms=round((time.perf_counter() - queued) * 1000, 3))
+            response = await self._get_with_retries(provider, url, params, headers, reader)
+        except (asyncio.CancelledError, RateLimitError):
+            # No verdict on the provider's health; free a half-open probe slot
+            if breaker is not None:
+                breaker.release()
+            raise
+        except Exception:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        
+        if breaker is not None:
+            if response.status_code == 429 or response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        return response
+    
+    async def _get_with_retries(self, provider, url, params, headers, reader):
+        """Perform the GET on the provider's session, retrying transient failures with backoff."""
+        session = await self._session(provider)
+        attempt = 0
+        while True:
+            try:
+                async with session.get(url, params=params, headers=headers) as response:
+                    delay = None
+                    if response.status in self.RETRY_STATUSES and attempt < self.max_retries:
+                        delay = self._backoff(attempt, response.headers.get('Retry-After'))
+                    # Never stall the caller longer than rate_limit_wait for a retry; past
+                    # that the throttled response is returned so the breaker counts it
+                    if delay is None or delay > self.rate_limit_wait:
+                        if reader is not None:
+                            return await reader(response)
+                        text = await response.text(errors='replace')
+                        return HTTPResponse(response.status, dict(response.headers), text)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            
+            attempt += 1
+            await asyncio.sleep(delay)
+    
+    def is_available(self, provider):
+        """Return whether the provider's circuit currently lets calls through."""
+        breaker = self.breakers.get(provider)
+        return breaker is None or breaker.state != CircuitBreaker.OPEN
+    
+    def provider_status(self):
+        """Return circuit breaker state and available rate limit tokens for each provider."""
+        status = {}
+        for provider, breaker in self.breakers.items():
+            status[provider] = breaker.snapshot()
+            limiter = self.rate_limiters.get(provider)
+            status[provider]['tokens'] = limiter.available() if limiter is not None else None
+        return status
+    
+    async def _close_async(self):
+        """Close every provider's HTTP session."""
+        for session in self._http.values():
+            if not session.closed:
+                await session.close()
+    
+    def close(self):
+        """Close the HTTP sessions, stop the lookup loop and close the persistent cache."""
+        with self._loop_lock:
+            loop = self._loop
+            self._loop = None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._close_async(), loop).result(5)
+            loop.call_soon_threadsafe(loop.stop)
+            self._loop_thread.join(timeout=5)
+            loop.close()
+            self._http = {}
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+    
+    # Synchronous API: thin wrappers that run the async implementations on the lookup loop
     
     def search_web(self, query, num_results=5):
         """Search the web for information using SerpAPI if available, or fallback to scraping."""
-        cache_key = f"search_{query}_{num_results}"
+        return self.run(self.search_web_async(query, num_results))
+    
+    def fetch_webpage_content(self, url, max_length=2000):
+        """Fetch content from a webpage and extract main text."""
+        return self.run(self.fetch_webpage_content_async(url, max_length))
+    
+    def fetch_pages(self, urls, max_length=2000, deadline=5.0):
+        """Fetch several webpages concurrently, returning those that finish before the deadline."""
+        return self.run(self.fetch_pages_async(urls, max_length, deadline))
+    
+    def get_weather(self, location):
+        """Get weather information for a location."""
+        return self.run(self.get_weather_async(location))
+    
+    def get_news(self, topic="general", count=5):
+        """Get latest news headlines."""
+        return self.run(self.get_news_async(topic, count))
+    
+    def check_stock(self, symbol, deadline=10.0):
+        """Get stock information, waiting at most deadline seconds on the provider quota."""
+        return self.run(self.check_stock_async(symbol, deadline))
+    
+    def check_stocks(self, symbols, deadline=None):
+        """Get stock information for several symbols, pacing calls to the provider quota."""
+        return self.run(self.check_stocks_async(symbols, deadline))
+    
+    def warm_up(self, location=None, news_category=None, watchlist=None, deadline=10.0):
+        """Open pooled connections to the configured providers and optionally prefill the cache."""
+        return self.run(self.warm_up_async(location, news_category, watchlist, deadline))
+    
+    # Async API
+    
+    async def warm_up_async(self, location=None, news_category=None, watchlist=None, deadline=10.0):
+        """Async version of warm_up.
         
-        # Check cache
-        if cache_key in self.cache:
-            cache_time, cache_data = self.cache[cache_key]
-            if time.time() - cache_time < self.cache_expiry:
-                return cache_data
+        Weather for location, headlines for news_category and quotes for the
+        first warm_up_symbols watchlist symbols are fetched through the normal
+        cached lookups, so warming never spends the whole stock quota. Every
+        other provider with a key configured gets a HEAD request to its host, so
+        DNS, TCP and TLS setup are done and a keep-alive connection is left in
+        the pool. Returns a dict of step name to "ok" or the error message.
+        Stock quotes still queued on the rate limiter at the deadline keep
+        loading in the background.
+        """
+        steps = {}
+        if location:
+            steps['weather'] = self.get_weather_async(location)
+        if news_category:
+            steps['news'] = self.get_news_async(news_category)
+        if watchlist:
+            steps['stock'] = self.check_stocks_async(watchlist[:self.warm_up_symbols], deadline)
+        
+        providers = {
+            'serpapi' if self.serpapi_key else 'duckduckgo': True,
+            'weather': os.environ.get("OPENWEATHERMAP_KEY"),
+            'news': os.environ.get("NEWSAPI_KEY"),
+            'stock': os.environ.get("ALPHAVANTAGE_KEY"),
+        }
+        for provider, configured in providers.items():
+            if configured and provider not in steps:
+                steps[f"connect.{provider}"] = self._preconnect(provider, self.endpoints[provider])
         
+        # Lookups report failures as strings; anything else means the step worked
+        results = await asyncio.gather(*steps.values(), return_exceptions=True)
+        status = {}
+        for name, result in zip(steps, results):
+            if name == 'stock' and isinstance(result, dict):
+                # One entry per symbol; quotes are dicts, failures and queued symbols strings
+                failed = [f"{symbol}: {quote}" for symbol, quote in result.items() if isinstance(quote, str)]
+                result = "; ".join(failed) if failed else result
+            if isinstance(result, Exception):
+                status[name] = f"Warm-up error: {str(result)}"
+            elif isinstance(result, str):
+                status[name] = result
+            else:
+                status[name] = "ok"
+        return status
+    
+    async def _preconnect(self, provider, url):
+        """Open a keep-alive connection to url's host and return it to the provider's pool."""
+        parts = urlsplit(url)
+        session = await self._session(provider)
+        with self.tracer.span(f"connect.{parts.hostname}"):
+            async with session.head(f"{parts.scheme}://{parts.netloc}/", allow_redirects=False) as response:
+                return response.status
+    
+    async def search_web_async(self, query, num_results=5):
+        """Async version of search_web."""
+        cache_key = f"search_{query}_{num_results}"
+        
+        return await self._cached(cache_key, lambda: self._search(query, num_results, cache_key))
+    
+    async def _search(self, query, num_results, cache_key):
+        """Run a web search against the providers and cache the results."""
         results = []
         
         # Try SerpAPI if key is available
@@ -44,8 +551,13 @@ class InternetUtils:
                     "api_key": self.serpapi_key,
                     "num": num_results
                 }
-                response = requests.get('https://serpapi.com/search', params=params)
+                response = await self._get('serpapi', self.endpoints['serpapi'], params=params)
+                # Quota and key errors come back as JSON too; don't cache them as "no results"
+                if response.status_code != 200:
+                    raise ValueError(f"received status code {response.status_code}")
                 data = response.json()
+                if 'error' in data:
+                    raise ValueError(data['error'])
                 
                 if 'organic_results' in data:
                     for result in data['organic_results'][:num_results]:
@@ -56,7 +568,7 @@ class InternetUtils:
                         })
                 
                 # Cache the results
-                self.cache[cache_key] = (time.time(), results)
+                await self._store(cache_key, results)
                 return results
             except Exception as e:
                 print(f"SerpAPI error: {str(e)}")
@@ -67,98 +579,170 @@ class InternetUtils:
         # due to anti-scraping measures
         try:
             # Using DuckDuckGo as it's more scraping-friendly
-            search_url = f"https://lite.duckduckgo.com/lite/?q={query}"
-            response = requests.get(search_url, headers=self.headers)
+            search_url = self.endpoints['duckduckgo']
+            response = await self._get('duckduckgo', search_url, params={'q': query})
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Extract results from DuckDuckGo Lite
-                for idx, result in enumerate(soup.select('a[href^="http"]')):
-                    if idx >= num_results:
-                        break
-                    
-                    title = result.get_text().strip()
-                    link = result.get('href')
-                    
-                    # Skip if it doesn't look like a valid result
-                    if not title or not link or link.startswith('/'):
-                        continue
-                    
-                    results.append({
-                        'title': title,
-                        'link': link,
-                        'snippet': 'Description not available'
-                    })
+            if response.status_code != 200:
+                return self._negative(cache_key, self._search_error(f"Received status code {response.status_code}"),
+                                      not_found=response.status_code in self.NOT_FOUND_STATUSES)
+            
+            # Parsing is CPU bound, so keep it off the event loop
+            results = await asyncio.to_thread(self._parse_duckduckgo, response.text, num_results)
             
             # Cache the results
-            self.cache[cache_key] = (time.time(), results)
+            await self._store(cache_key, results)
             return results
         except Exception as e:
-            return [{'title': 'Search Error', 'link': '#', 'snippet': f"Error performing search: {str(e)}"}]
+            return self._negative(cache_key, self._search_error(f"Error performing search: {str(e)}"), error=e)
     
-    def fetch_webpage_content(self, url, max_length=2000):
-        """Fetch content from a webpage and extract main text."""
+    def _search_error(self, message):
+        """Return the single-result list search_web reports a failed search with."""
+        return [{'title': self.SEARCH_ERROR_TITLE, 'link': '#', 'snippet': message}]
+    
+    async def fetch_webpage_content_async(self, url, max_length=2000):
+        """Async version of fetch_webpage_content."""
         cache_key = f"webpage_{url}"
         
-        # Check cache
-        if cache_key in self.cache:
-            cache_time, cache_data = self.cache[cache_key]
-            if time.time() - cache_time < self.cache_expiry:
-                return cache_data
-        
+        return await self._cached(cache_key, lambda: self._fetch_webpage(url, max_length, cache_key))
+    
+    async def _fetch_webpage(self, url, max_length, cache_key):
+        """Download a webpage, extract its text and cache it."""
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            if self.stream_pages:
+                response = await self._get('webpage', url, reader=lambda r: self._read_page_text(r, max_length))
+            else:
+                response = await self._get('webpage', url)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Remove script and style elements
-                for script in soup(["script", "style"]):
-                    script.extract()
-                
-                # Get text
-                text = soup.get_text()
-                
-                # Break into lines and remove leading and trailing space on each
-                lines = (line.strip() for line in text.splitlines())
-                
-                # Break multi-headlines into a line each
-                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                
-                # Join the lines
-                text = '\n'.join(chunk for chunk in chunks if chunk)
-                
-                # Truncate if too long
-                if len(text) > max_length:
-                    text = text[:max_length] + "..."
+                if self.stream_pages:
+                    text = response.text
+                else:
+                    # Parsing is CPU bound, so keep it off the event loop
+                    with self.tracer.span("extract", streamed=False, bytes=len(response.text)):
+                        text = await asyncio.to_thread(self._extract_text, response.text, max_length)
                 
                 # Cache result
-                self.cache[cache_key] = (time.time(), text)
+                await self._store(cache_key, text)
                 return text
             else:
-                return f"Error: Received status code {response.status_code}"
+                return self._negative(cache_key, f"Error: Received status code {response.status_code}",
+                                      not_found=response.status_code in self.NOT_FOUND_STATUSES)
         except Exception as e:
-            return f"Error fetching webpage: {str(e)}"
+            return self._negative(cache_key, f"Error fetching webpage: {str(e)}", error=e)
     
-    def get_weather(self, location):
-        """Get weather information for a location."""
-        cache_key = f"weather_{location}"
+    async def _read_page_text(self, response, max_length):
+        """Stream a page body through VisibleTextParser, stopping early when possible."""
+        if response.status != 200:
+            return HTTPResponse(response.status, dict(response.headers), '')
         
-        # Check cache
-        if cache_key in self.cache:
-            cache_time, cache_data = self.cache[cache_key]
-            if time.time() - cache_time < self.cache_expiry:
-                return cache_data
+        # Skip downloads we could never extract text from
+        content_type = response.headers.get('Content-Type') and response.content_type
+        if content_type and content_type not in HTML_CONTENT_TYPES:
+            raise ValueError(f"unsupported content type {content_type}")
         
+        try:
+            decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        
+        with self.tracer.span("extract", streamed=True) as span:
+            parser = VisibleTextParser(max_length)
+            received = 0
+            async for chunk in response.content.iter_chunked(16 * 1024):
+                chunk = chunk[:self.max_page_bytes - received]
+                received += len(chunk)
+                # Feeding the parser is CPU bound, so keep it off the event loop
+                await asyncio.to_thread(parser.feed, decoder.decode(chunk))
+                if parser.done or received >= self.max_page_bytes:
+                    break
+            parser.feed(decoder.decode(b'', final=True))
+            parser.close()
+            span.set(bytes=received, stopped_early=parser.done)
+        
+        return HTTPResponse(response.status, dict(response.headers), truncate_text(parser.text(), max_length))
+    
+    async def fetch_pages_async(self, urls, max_length=2000, deadline=5.0):
+        """Async version of fetch_pages.
+        
+        Returns a list of (url, text) pairs in the order of urls. Pages that fail
+        or are still loading when the deadline passes are dropped.
+        """
+        tasks = [asyncio.ensure_future(self.fetch_webpage_content_async(url, max_length)) for url in urls]
+        if not tasks:
+            return []
+        
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=deadline)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+        for task in pending:
+            task.cancel()
+        
+        pages = []
+        for url, task in zip(urls, tasks):
+            if task in done and not task.cancelled() and task.exception() is None:
+                text = task.result()
+                if text and not text.startswith("Error"):
+                    pages.append((url, text))
+        return pages
+    
+    @staticmethod
+    def _parse_duckduckgo(html, num_results):
+        """Extract up to num_results results from a DuckDuckGo Lite page."""
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        results = []
+        for idx, result in enumerate(soup.select('a[href^="http"]')):
+            if idx >= num_results:
+                break
+            
+            title = result.get_text().strip()
+            link = result.get('href')
+            
+            # Skip if it doesn't look like a valid result
+            if not title or not link or link.startswith('/'):
+                continue
+            
+            results.append({
+                'title': title,
+                'link': link,
+                'snippet': 'Description not available'
+            })
+        return results
+    
+    @staticmethod
+    def _extract_text(html, max_length):
+        """Extract visible text from an HTML document, truncated to max_length."""
+        # Imported on first use to keep it off the startup path
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Remove script and style elements
+        for script in soup(["script", "style"]):
+            script.extract()
+        
+        return truncate_text(normalize_text(soup.get_text()), max_length)
+    
+    async def get_weather_async(self, location):
+        """Async version of get_weather."""
+        cache_key = f"weather_{location}"
+        
+        return await self._cached(cache_key, lambda: self._fetch_weather(location, cache_key))
+    
+    async def _fetch_weather(self, location, cache_key):
+        """Fetch current weather from OpenWeatherMap and cache it."""
         try:
             # Using OpenWeatherMap API
             api_key = os.environ.get("OPENWEATHERMAP_KEY")
             if not api_key:
                 return "Weather API key not configured."
             
-            url = f"https://api.openweathermap.org/data/2.5/weather?q={location}&appid={api_key}&units=metric"
-            response = requests.get(url)
+            url = self.endpoints['weather']
+            params = {'q': location, 'appid': api_key, 'units': 'metric'}
+            response = await self._get('weather', url, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -174,31 +758,31 @@ class InternetUtils:
                 }
                 
                 # Cache result
-                self.cache[cache_key] = (time.time(), weather_info)
+                await self._store(cache_key, weather_info)
                 return weather_info
             else:
-                return f"Weather lookup failed with status code: {response.status_code}"
+                return self._negative(cache_key, f"Weather lookup failed with status code: {response.status_code}",
+                                      not_found=response.status_code in self.NOT_FOUND_STATUSES)
         except Exception as e:
-            return f"Error getting weather: {str(e)}"
+            return self._negative(cache_key, f"Error getting weather: {str(e)}", error=e)
     
-    def get_news(self, topic="general", count=5):
-        """Get latest news headlines."""
+    async def get_news_async(self, topic="general", count=5):
+        """Async version of get_news."""
         cache_key = f"news_{topic}_{count}"
         
-        # Check cache
-        if cache_key in self.cache:
-            cache_time, cache_data = self.cache[cache_key]
-            if time.time() - cache_time < self.cache_expiry:
-                return cache_data
-        
+        return await self._cached(cache_key, lambda: self._fetch_news(topic, count, cache_key))
+    
+    async def _fetch_news(self, topic, count, cache_key):
+        """Fetch top headlines from NewsAPI and cache them."""
         try:
             # Using NewsAPI
             api_key = os.environ.get("NEWSAPI_KEY")
             if not api_key:
                 return "News API key not configured."
             
-            url = f"https://newsapi.org/v2/top-headlines?category={topic}&language=en&pageSize={count}&apiKey={api_key}"
-            response = requests.get(url)
+            url = self.endpoints['news']
+            params = {'category': topic, 'language': 'en', 'pageSize': count, 'apiKey': api_key}
+            response = await self._get('news', url, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -215,38 +799,59 @@ class InternetUtils:
                         })
                     
                     # Cache result
-                    self.cache[cache_key] = (time.time(), articles)
+                    await self._store(cache_key, articles)
                     return articles
                 else:
-                    return "Failed to fetch news data"
+                    return self._negative(cache_key, "Failed to fetch news data")
             else:
-                return f"News API request failed with status code: {response.status_code}"
+                return self._negative(cache_key, f"News API request failed with status code: {response.status_code}")
         except Exception as e:
-            return f"Error getting news: {str(e)}"
+            return self._negative(cache_key, f"Error getting news: {str(e)}", error=e)
     
-    def check_stock(self, symbol):
-        """Get stock information."""
-        cache_key = f"stock_{symbol}"
+    async def check_stock_async(self, symbol, deadline=None):
+        """Async version of check_stock.
         
-        # Check cache - shorter expiry for stock data
-        stock_cache_expiry = 300  # 5 minutes
-        if cache_key in self.cache:
-            cache_time, cache_data = self.cache[cache_key]
-            if time.time() - cache_time < stock_cache_expiry:
-                return cache_data
+        If the quote is still queued on the stock rate limiter after deadline
+        seconds, a "queued" message is returned and the lookup keeps loading in
+        the background so a repeat question is served from the cache.
+        """
+        cache_key = f"stock_{symbol}"
+        lookup = self._cached(cache_key, lambda: self._fetch_stock(symbol, cache_key))
+        if deadline is None:
+            return await lookup
         
+        task = asyncio.ensure_future(lookup)
+        try:
+            done, _ = await asyncio.wait([task], timeout=deadline)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        return task.result() if task in done else self._queued_message(symbol)
+    
+    @staticmethod
+    def _queued_message(symbol):
+        return f"Stock lookup for {symbol} is queued behind the provider rate limit"
+    
+    async def _fetch_stock(self, symbol, cache_key):
+        """Fetch a stock quote from Alpha Vantage and cache it."""
         try:
             # Using Alpha Vantage API
             api_key = os.environ.get("ALPHAVANTAGE_KEY")
             if not api_key:
                 return "Stock API key not configured."
             
-            url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={symbol}&apikey={api_key}"
-            response = requests.get(url)
+            # Queue for our turn in the provider quota rather than failing fast
+            url = self.endpoints['stock']
+            params = {'function': 'GLOBAL_QUOTE', 'symbol': symbol, 'apikey': api_key}
+            response = await self._get('stock', url, params=params, max_wait=self.stock_queue_wait)
             
             if response.status_code == 200:
                 data = response.json()
                 
+                # Alpha Vantage reports throttling as a 200 with a "Note" or "Information" message
+                if 'Note' in data or 'Information' in data:
+                    return f"Stock API rate limit reached: {data.get('Note') or data.get('Information')}"
+                
                 if 'Global Quote' in data and data['Global Quote']:
                     quote = data['Global Quote']
                     stock_info = {
@@ -259,11 +864,44 @@ class InternetUtils:
                     }
                     
                     # Cache result
-                    self.cache[cache_key] = (time.time(), stock_info)
+                    await self._store(cache_key, stock_info)
                     return stock_info
                 else:
-                    return f"No stock data found for {symbol}"
+                    return self._negative(cache_key, f"No stock data found for {symbol}", not_found=True)
             else:
-                return f"Stock API request failed with status code: {response.status_code}"
+                return self._negative(cache_key, f"Stock API request failed with status code: {response.status_code}")
         except Exception as e:
-            return f"Error getting stock data: {str(e)}"
\ No newline at end of file
+            return self._negative(cache_key, f"Error getting stock data: {str(e)}", error=e)
+    
+    async def check_stocks_async(self, symbols, deadline=None):
+        """Async version of check_stocks.
+        
+        Returns a dict mapping each symbol to its quote dict or an error string.
+        Cached symbols (including stale and negative entries) are answered
+        immediately; the rest are queued through the stock rate limiter. If
+        deadline seconds pass first, the unfinished symbols are reported as
+        pending and keep loading in the background so a repeat question is
+        served from the cache.
+        """
+        # Normalize and de-duplicate while keeping the caller's order
+        symbols = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols if symbol.strip()))
+        
+        # Cached symbols complete immediately; the rest queue on the stock rate limiter
+        tasks = {symbol: asyncio.ensure_future(self.check_stock_async(symbol)) for symbol in symbols}
+        
+        quotes = {}
+        if tasks:
+            try:
+                done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+            except asyncio.CancelledError:
+                # A cancelled caller gives its queued quotes back to the rate limiter
+                for task in tasks.values():
+                    task.cancel()
+                raise
+            for symbol, task in tasks.items():
+                if task in done:
+                    quotes[symbol] = task.result()
+                else:
+                    quotes[symbol] = self._queued_message(symbol)
+        
+        return {symbol: quotes[symbol] for symbol in symbols}
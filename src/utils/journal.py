@@ -0,0 +1,210 @@
+import itertools
+import json
+import os
+import textwrap
+import threading
+
+
+class ConversationJournal:
+    """Append-only JSONL log of a conversation, written one message at a time.
+
+    Each line is a message dict. Clearing the conversation appends a marker
+    record instead of rewriting the file, so every write is a short append.
+    Lines are flushed to the OS immediately; fsync is batched every
+    sync_interval seconds or sync_every records, whichever comes first.
+    """
+
+    CLEAR = {"_event": "clear"}
+
+    def __init__(self, path, sync_interval=1.0, sync_every=32, compact_bytes=16 * 1024 * 1024):
+        """Open (or create) the journal and start the background fsync thread."""
+        self.path = os.path.abspath(os.path.expanduser(path))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.sync_interval = sync_interval
+        self.sync_every = sync_every
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        # A crash mid-write can leave a torn last line; start the next record on a fresh line
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b'\n'
+            if torn:
+                with open(self.path, 'ab') as f:
+                    f.write(b'\n')
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+        # Drop records hidden by a clear once the file gets large. Without a clear
+        # there is nothing to drop, so a long live conversation is left alone.
+        if compact_bytes and os.path.getsize(self.path) > compact_bytes and self._live_offset() > 0:
+            self.compact()
+
+        self._stop = threading.Event()
+        self._syncer = None
+        if sync_interval:
+            self._syncer = threading.Thread(target=self._sync_loop, daemon=True)
+            self._syncer.start()
+
+    def append(self, message):
+        """Append one message, without private bookkeeping keys."""
+        record = {key: value for key, value in message.items() if not key.startswith("_")}
+        self._write(record)
+
+    def clear(self):
+        """Record that the conversation was cleared."""
+        self._write(self.CLEAR)
+
+    def _write(self, record):
+        """Write a record and fsync if enough records are pending."""
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._pending += 1
+            if self._pending >= self.sync_every:
+                self._sync()
+
+    def sync(self):
+        """Force pending records to disk."""
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        """fsync pending records. Caller must hold the lock."""
+        if self._pending and not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def _sync_loop(self):
+        """Periodically fsync records written since the last sync."""
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except (OSError, ValueError) as e:
+                print(f"Journal sync error: {str(e)}")
+
+    def _reverse_records(self, block_size=64 * 1024):
+        """Yield the journal's records newest first, reading the file backwards in blocks."""
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            buffer = b''
+            while position > 0:
+                size = min(block_size, position)
+                position -= size
+                f.seek(position)
+                buffer = f.read(size) + buffer
+                lines = buffer.split(b'\n')
+                buffer = lines.pop(0)
+                for line in reversed(lines):
+                    record = self._parse(line)
+                    if record is not None:
+                        yield record
+            record = self._parse(buffer)
+            if record is not None:
+                yield record
+
+    @staticmethod
+    def _parse(line):
+        """Decode one journal line, skipping blanks and torn writes."""
+        if not line.strip():
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def tail(self, fits=None):
+        """Return the messages since the last clear, oldest first.
+
+        Reading starts at the end of the file and stops at the last clear or at
+        the first message (walking backwards) for which fits(message) is false,
+        so resuming a long conversation reads only what will be used.
+        """
+        with self._lock:
+            self._file.flush()
+
+        messages = []
+        for record in self._reverse_records():
+            if record.get("_event") == "clear":
+                break
+            if fits is not None and not fits(record):
+                break
+            messages.append(record)
+        messages.reverse()
+        return messages
+
+    def compact(self, keep=None):
+        """Rewrite the journal with only the live conversation, or its last keep messages."""
+        with self._lock:
+            self._file.flush()
+            messages = []
+            for record in self._reverse_records():
+                if record.get("_event") == "clear" or (keep is not None and len(messages) >= keep):
+                    break
+                messages.append(record)
+            messages.reverse()
+
+            # Write the compacted copy beside the journal and swap it in atomically
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for message in messages:
+                    f.write(json.dumps(message, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(temp_path, self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._pending = 0
+        return len(messages)
+
+    def export(self, filename, header=()):
+        """Write the live conversation to filename as a JSON list, the format save_conversation uses.
+
+        Messages are streamed so the whole conversation is never held in memory
+        at once; header messages (e.g. the system prompt) are written first.
+        """
+        with self._lock:
+            self._file.flush()
+        start = self._live_offset()
+
+        count = 0
+        with open(filename, 'w', encoding='utf-8') as out, open(self.path, 'rb') as f:
+            f.seek(start)
+            out.write("[")
+            records = (self._parse(line) for line in f)
+            for message in itertools.chain(header, records):
+                if message is None:
+                    continue
+                out.write(("," if count else "") + "\n" + textwrap.indent(json.dumps(message, indent=2), "  "))
+                count += 1
+            out.write("\n]" if count else "]")
+        return filename
+
+    def _live_offset(self):
+        """Return the byte offset where the live conversation starts: just after the last clear."""
+        start = 0
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                offset += len(line)
+                if b'"_event"' in line:
+                    record = self._parse(line)
+                    if record is not None and record.get("_event") == "clear":
+                        start = offset
+        return start
+
+    def close(self):
+        """Stop the fsync thread, sync pending records and close the file."""
+        self._stop.set()
+        if self._syncer is not None:
+            self._syncer.join(timeout=5)
+        with self._lock:
+            self._sync()
+            self._file.close()
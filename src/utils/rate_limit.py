@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimitError(Exception):
+    """Raised when a rate limiter cannot grant a token within the allowed wait."""
+
+    def __init__(self, name, wait):
+        super().__init__(f"{name} rate limit reached (next slot in {wait:.1f}s)")
+        self.name = name
+        self.wait = wait
+
+
+class TokenBucket:
+    """Token-bucket rate limiter usable from coroutines and plain threads."""
+
+    def __init__(self, rate, capacity=None, name='provider'):
+        """Allow rate tokens per second with bursts of up to capacity tokens."""
+        if rate <= 0:
+            raise ValueError(f"{name} rate limit must be positive, got {rate}")
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add tokens earned since the last update. Caller must hold the lock."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available right now and return whether it succeeded."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def delay(self, tokens=1):
+        """Return how many seconds until tokens will be available."""
+        with self._lock:
+            self._refill()
+            missing = tokens - self._tokens
+            if missing <= 0:
+                return 0.0
+            return missing / self.rate
+
+    async def acquire(self, tokens=1, max_wait=None):
+        """Reserve tokens and sleep until they are due, first come first served.
+
+        Reservations may drive the balance negative, which queues later callers
+        behind earlier ones. Raises RateLimitError instead of waiting longer than
+        max_wait seconds.
+        """
+        with self._lock:
+            self._refill()
+            missing = tokens - self._tokens
+            wait = max(0.0, missing / self.rate)
+            if max_wait is not None and wait > max_wait:
+                raise RateLimitError(self.name, wait)
+            self._tokens -= tokens
+
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # Hand the reservation back so cancelled callers don't delay the queue
+                with self._lock:
+                    self._tokens += tokens
+                raise
+
+    def available(self):
+        """Return the number of tokens currently available."""
+        with self._lock:
+            self._refill()
+            return self._tokens
@@ -0,0 +1,358 @@
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# The span new spans attach to; each thread and asyncio task sees its own value
+_current = contextvars.ContextVar('friday_span', default=None)
+
+
+class Span:
+    """A timed stage of a request, with attributes and child spans."""
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.parent = parent
+        self.attributes = dict(attributes or {})
+        self.children = []
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms = None
+        if parent is not None:
+            parent.children.append(self)
+
+    def set(self, **attributes):
+        """Add or replace attributes."""
+        self.attributes.update(attributes)
+
+    def child(self, name, **attributes):
+        """Start a child span without making it current; call finish() when it ends."""
+        return Span(name, self, attributes)
+
+    def finish(self):
+        """Record the span's duration."""
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def walk(self):
+        """Yield this span and all of its descendants."""
+        yield self
+        for child in list(self.children):
+            yield from child.walk()
+
+    def to_dict(self):
+        """Return the span tree as plain data."""
+        return {
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            'attributes': self.attributes,
+            'children': [child.to_dict() for child in list(self.children)],
+        }
+
+
+class _NullSpan:
+    """Stands in for a span when nothing is being traced."""
+
+    def set(self, **attributes):
+        pass
+
+    def child(self, name, **attributes):
+        return self
+
+    def finish(self):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Builds per-request span trees and hands each finished trace to its sinks.
+
+    When no sink is registered, trace() and span() are no-ops, so instrumented
+    code costs next to nothing.
+    """
+
+    def __init__(self, sinks=None):
+        self.sinks = list(sinks or [])
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink):
+        """Register a sink; it receives every finished root span via emit()."""
+        with self._lock:
+            self.sinks.append(sink)
+        return sink
+
+    def remove_sink(self, sink):
+        """Unregister a sink."""
+        with self._lock:
+            if sink in self.sinks:
+                self.sinks.remove(sink)
+
+    @contextmanager
+    def trace(self, name, **attributes):
+        """Start a request trace. Nested traces become spans of the outer one."""
+        if _current.get() is not None:
+            with self.span(name, **attributes) as span:
+                yield span
+            return
+
+        root = self.start_trace(name, **attributes)
+        try:
+            with self.activate(root):
+                yield root
+        except BaseException as e:
+            root.set(error=type(e).__name__)
+            raise
+        finally:
+            self.finish_trace(root)
+
+    def start_trace(self, name, **attributes):
+        """Create a root span without making it current, for traces that outlive one block (e.g. generators)."""
+        if not self.sinks:
+            return NULL_SPAN
+        return Span(name, None, attributes)
+
+    def finish_trace(self, root):
+        """End a trace started with start_trace and emit it."""
+        if root is NULL_SPAN:
+            return
+        root.finish()
+        self._emit(root)
+
+    @contextmanager
+    def activate(self, span):
+        """Make span the current span for the duration of the block."""
+        if span is NULL_SPAN:
+            yield span
+            return
+        token = _current.set(span)
+        try:
+            yield span
+        finally:
+            _current.reset(token)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Time a stage of the current trace. Outside a trace this is a no-op."""
+        parent = _current.get()
+        if parent is None:
+            yield NULL_SPAN
+            return
+
+        span = Span(name, parent, attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            _current.reset(token)
+            span.finish()
+
+    def _emit(self, root):
+        """Pass a finished trace to every sink."""
+        with self._lock:
+            sinks = list(self.sinks)
+        for sink in sinks:
+            try:
+                sink.emit(root)
+            except Exception as e:
+                print(f"Trace sink error: {str(e)}")
+
+
+def current_span():
+    """Return the active span, or None outside a trace."""
+    return _current.get()
+
+
+async def bind(coro, span):
+    """Await coro with span as its active span, e.g. on another thread's event loop.
+
+    Pass span=None to detach background work from the caller's trace.
+    """
+    token = _current.set(span)
+    try:
+        return await coro
+    finally:
+        _current.reset(token)
+
+
+class LogSink:
+    """Appends each trace to a file as one JSON line."""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def emit(self, root):
+        line = json.dumps(root.to_dict(), default=str) + "\n"
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+
+class HistogramSink:
+    """Aggregates span latencies, token usage and cache results in memory."""
+
+    # Upper bounds of the latency buckets, in milliseconds
+    BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self._lock = threading.Lock()
+        # span name -> [bucket counts..., +Inf count], total count, total ms
+        self.latency = {}
+        self.tokens = {}
+        self.cache = {}
+        self.errors = {}
+
+    def emit(self, root):
+        with self._lock:
+            for span in root.walk():
+                if span.duration_ms is None:
+                    continue  # Background work still running when the trace ended
+                self._observe(span.name, span.duration_ms)
+
+                attributes = span.attributes
+                for kind in ('prompt_tokens', 'completion_tokens'):
+                    if isinstance(attributes.get(kind), int):
+                        key = (attributes.get('model', ''), kind)
+                        self.tokens[key] = self.tokens.get(key, 0) + attributes[kind]
+                if 'cache' in attributes:
+                    key = (span.name, str(attributes['cache']))
+                    self.cache[key] = self.cache.get(key, 0) + 1
+                if 'error' in attributes:
+                    self.errors[span.name] = self.errors.get(span.name, 0) + 1
+
+    def _observe(self, name, duration_ms):
+        """Add one latency sample. Caller must hold the lock."""
+        entry = self.latency.get(name)
+        if entry is None:
+            entry = self.latency[name] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+        entry[0][bisect.bisect_left(self.buckets, duration_ms)] += 1
+        entry[1] += 1
+        entry[2] += duration_ms
+
+    def percentile(self, name, fraction):
+        """Return the bucket bound at or below which fraction (0-1) of the samples for name fall."""
+        with self._lock:
+            entry = self.latency.get(name)
+            if entry is None or not entry[1]:
+                return None
+            rank = fraction * entry[1]
+            seen = 0
+            for bound, count in zip(self.buckets + (float('inf'),), entry[0]):
+                seen += count
+                if seen >= rank:
+                    return bound
+        return float('inf')
+
+    def snapshot(self):
+        """Return per-stage counts, mean and p50/p95 latency plus token and cache totals."""
+        with self._lock:
+            names = list(self.latency)
+            stages = {name: {'count': self.latency[name][1],
+                             'mean_ms': round(self.latency[name][2] / self.latency[name][1], 3)}
+                      for name in names}
+            tokens = {f"{model}:{kind}" if model else kind: count for (model, kind), count in self.tokens.items()}
+            cache = {f"{name}:{result}": count for (name, result), count in self.cache.items()}
+            errors = dict(self.errors)
+        for name in names:
+            stages[name]['p50_ms'] = self.percentile(name, 0.5)
+            stages[name]['p95_ms'] = self.percentile(name, 0.95)
+        return {'stages': stages, 'tokens': tokens, 'cache': cache, 'errors': errors}
+
+
+class PrometheusSink(HistogramSink):
+    """HistogramSink that renders its metrics in the Prometheus text exposition format."""
+
+    def render(self):
+        """Return the metrics as Prometheus text."""
+        lines = [
+            "# HELP friday_stage_duration_ms Latency of each request stage in milliseconds.",
+            "# TYPE friday_stage_duration_ms histogram",
+        ]
+        with self._lock:
+            for name, (counts, total, total_ms) in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float('inf') else f"{bound:g}"
+                    lines.append(f'friday_stage_duration_ms_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'friday_stage_duration_ms_sum{{stage="{name}"}} {total_ms:.3f}')
+                lines.append(f'friday_stage_duration_ms_count{{stage="{name}"}} {total}')
+
+            lines.append("# HELP friday_tokens_total Tokens used by model calls.")
+            lines.append("# TYPE friday_tokens_total counter")
+            for (model, kind), count in sorted(self.tokens.items()):
+                lines.append(f'friday_tokens_total{{model="{model}",kind="{kind.replace("_tokens", "")}"}} {count}')
+
+            lines.append("# HELP friday_cache_lookups_total Cache lookups by stage and result.")
+            lines.append("# TYPE friday_cache_lookups_total counter")
+            for (name, result), count in sorted(self.cache.items()):
+                lines.append(f'friday_cache_lookups_total{{stage="{name}",result="{result}"}} {count}')
+
+            lines.append("# HELP friday_stage_errors_total Stages that ended with an exception.")
+            lines.append("# TYPE friday_stage_errors_total counter")
+            for name, count in sorted(self.errors.items()):
+                lines.append(f'friday_stage_errors_total{{stage="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve render() at /metrics on a background thread and return the server."""
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = sink.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Return the process-wide tracer, configured from the environment on first use.
+
+    FRIDAY_TRACE_LOG names a JSONL file to append traces to, and
+    FRIDAY_METRICS_PORT serves Prometheus metrics on that port.
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+            log_path = os.environ.get("FRIDAY_TRACE_LOG")
+            if log_path:
+                _tracer.add_sink(LogSink(log_path))
+            metrics_port = os.environ.get("FRIDAY_METRICS_PORT")
+            if metrics_port:
+                try:
+                    _tracer.add_sink(PrometheusSink()).serve(int(metrics_port))
+                except (OSError, ValueError) as e:
+                    print(f"Metrics endpoint error: {str(e)}")
+        return _tracer
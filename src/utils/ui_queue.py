@@ -0,0 +1,79 @@
+import queue
+import tkinter as tk
+
+
+class UIQueue:
+    """Applies widget updates on the Tk main loop on behalf of any thread.
+
+    Tk widgets may only be touched from the main thread, so worker threads
+    post updates here instead. A root.after loop drains the queue once per
+    frame and merges consecutive text inserts into a single write(run) call,
+    where run alternates text and tags as Text.insert takes them, so a
+    streamed reply costs one widget update per frame rather than one per chunk.
+    """
+
+    def __init__(self, root, write, interval_ms=16, max_items=1000):
+        self.root = root
+        self.write = write
+        self.interval_ms = interval_ms
+        self.max_items = max_items
+        self._queue = queue.SimpleQueue()
+        self._after_id = None
+
+    def start(self):
+        """Start draining the queue. Call from the main thread."""
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        """Stop draining the queue. Call from the main thread."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the main loop, in order with other updates."""
+        self._queue.put((fn, args, kwargs))
+
+    def insert(self, text, tag=None):
+        """Queue text, optionally tagged, for the next write."""
+        self._queue.put((None, text, tag or ()))
+
+    def _drain(self):
+        """Apply up to max_items queued updates, then schedule the next frame."""
+        # Pending inserts as alternating text, tags arguments for one Text.insert call
+        run = []
+        for _ in range(self.max_items):
+            try:
+                fn, args, kwargs = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if fn is None:
+                text, tags = args, kwargs
+                if run and run[-1] == tags:
+                    run[-2] += text
+                else:
+                    run.extend((text, tags))
+                continue
+
+            self._flush(run)
+            run = []
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                print(f"UI update error: {str(e)}")
+        self._flush(run)
+
+        try:
+            self._after_id = self.root.after(self.interval_ms, self._drain)
+        except tk.TclError:
+            self._after_id = None  # The window was destroyed
+
+    def _flush(self, run):
+        """Pass a run of merged text to write."""
+        if not run:
+            return
+        try:
+            self.write(run)
+        except Exception as e:
+            print(f"UI update error: {str(e)}")
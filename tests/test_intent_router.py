@@ -0,0 +1,55 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.intent_router import IntentRouter
+
+
+router = IntentRouter()
+
+
+def route(message):
+    return [(intent.type, intent.entities) for intent in router.route(message)]
+
+
+def test_single_intent():
+    assert route("What's the weather in Boston?") == [('weather', {'location': 'boston'})]
+
+
+def test_search_then_news():
+    assert route("search for python and latest news") == [
+        ('news', {'topic': 'general'}),
+        ('search', {'query': 'python'}),
+    ]
+
+
+def test_tell_me_about_then_weather():
+    assert route("tell me about elon musk and the weather in boston") == [
+        ('weather', {'location': 'boston'}),
+        ('search', {'query': 'elon musk'}),
+    ]
+
+
+def test_weather_then_news_topic():
+    assert route("weather in paris and news about football") == [
+        ('weather', {'location': 'paris'}),
+        ('news', {'topic': 'football'}),
+    ]
+
+
+def test_repeated_intent_type():
+    assert route("weather in paris and weather in london") == [
+        ('weather', {'location': 'paris'}),
+        ('weather', {'location': 'london'}),
+    ]
+
+
+def test_overlapping_lower_priority_intent_dropped():
+    assert route("what is the weather in boston") == [('weather', {'location': 'boston'})]
+
+
+def test_portfolio_keeps_and_between_symbols():
+    assert route("stock prices for aapl, msft and goog") == [
+        ('portfolio', {'symbols': ['AAPL', 'MSFT', 'GOOG']}),
+    ]
@@ -0,0 +1,79 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.cancel import CancelToken, RequestCancelled
+from utils.internet_utils import InternetUtils
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Answers every GET after a second, like a slow page or quote API."""
+
+    def do_GET(self):
+        time.sleep(1.0)
+        body = b'{"Global Quote": {"01. symbol": "X"}}' if "query" in self.path else b"<p>slow page</p>"
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json" if "query" in self.path else "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def cancel_after(internet, coro, delay):
+    cancel = CancelToken()
+    timer = threading.Timer(delay, cancel.cancel)
+    timer.start()
+    try:
+        with pytest.raises(RequestCancelled):
+            internet.run(coro, cancel=cancel)
+    finally:
+        timer.cancel()
+
+
+def test_cancelled_fetch_pages_stops_its_fetches(base_url):
+    internet = InternetUtils(max_retries=0)
+    urls = [f"{base_url}/pages/{n}" for n in range(3)]
+    try:
+        cancel_after(internet, internet.fetch_pages_async(urls, deadline=5.0), 0.3)
+        time.sleep(1.5)
+        assert internet._inflight == {}
+        assert all(internet.cache.peek(f"webpage_{url}") is None for url in urls)
+    finally:
+        internet.close()
+
+
+def test_cancelled_check_stocks_releases_queued_quotes(base_url, monkeypatch):
+    monkeypatch.setenv("ALPHAVANTAGE_KEY", "test")
+    internet = InternetUtils(max_retries=0, endpoints={'stock': f"{base_url}/query"},
+                             rate_limits={'stock': (0.5, 1)})
+    try:
+        cancel_after(internet, internet.check_stocks_async(["AAA", "BBB", "CCC"]), 0.3)
+        time.sleep(1.5)
+        assert internet._inflight == {}
+        assert internet.cache.peek("stock_AAA") is None
+        # The queued reservations were handed back to the limiter
+        assert internet.rate_limiters['stock'].available() > -1
+    finally:
+        internet.close()